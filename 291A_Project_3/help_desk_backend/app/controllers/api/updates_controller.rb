@@ -1,5 +1,6 @@
 module Api
   class UpdatesController < ApplicationController
+    reads_from_replica only: [:conversations, :messages, :expert_queue]
 
     # GET /api/conversations/updates?userId=<id>&since=<timestamp>
     def conversations
@@ -20,11 +21,9 @@ module Api
       ).where("updated_at >= ?", since)
 
       # Build response with unreadCount for each conversation
-      response_data = conversations.map do |conv|
-        ConversationSerializer.for_user(conv, viewer_id: user_id)
-      end
+      response_data = ConversationSerializer.collection_for_user(conversations, viewer_id: user_id)
 
-      render json: response_data, status: :ok
+      render_fast_json response_data
     end
 
     # GET /api/messages/updates?userId=<id>&since=<timestamp>
@@ -45,24 +44,12 @@ module Api
         user_id
       ).pluck(:id)
 
-      # Get messages in those conversations since timestamp
-      messages_data = Message.where(
-        conversation_id: user_conversations
-      ).where("created_at >= ?", since).map do |msg|
-        sender = User.find(msg.sender_id)
-        {
-          id: msg.id.to_s,
-          conversationId: msg.conversation_id.to_s,
-          senderId: msg.sender_id.to_s,
-          senderUsername: sender.username,
-          senderRole: msg.sender_role,
-          content: msg.content,
-          timestamp: msg.created_at.iso8601,
-          isRead: msg.is_read
-        }
-      end
-
-      render json: messages_data, status: :ok
+      # Get messages in those conversations since timestamp (senders in one query)
+      messages_data = MessageSerializer.collection(
+        Message.where(conversation_id: user_conversations).where("created_at >= ?", since)
+      )
+
+      render_fast_json messages_data
     end
 
     # GET /api/expert-queue/updates?expertId=<id>&since=<timestamp>
@@ -87,21 +74,21 @@ module Api
       ).where("updated_at >= ?", since)
 
       # Build response
-      waiting_data = waiting_conversations.map { |conv| build_conversation_response(conv, expert_id) }
-      assigned_data = assigned_conversations.map { |conv| build_conversation_response(conv, expert_id) }
+      waiting_data = build_conversations_response(waiting_conversations, expert_id)
+      assigned_data = build_conversations_response(assigned_conversations, expert_id)
 
       response_data = {
         waitingConversations: waiting_data,
         assignedConversations: assigned_data
       }
 
-      render json: response_data, status: :ok
+      render_fast_json response_data
     end
 
     private
 
-    def build_conversation_response(conv, expert_id)
-      ConversationSerializer.for_user(conv, viewer_id: expert_id)
+    def build_conversations_response(conversations, expert_id)
+      ConversationSerializer.collection_for_user(conversations, viewer_id: expert_id)
     end
   end
 end
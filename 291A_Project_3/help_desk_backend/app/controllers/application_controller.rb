@@ -1,11 +1,19 @@
 class ApplicationController < ActionController::API
   # NOTE: added for LLM setup
   include ActionController::Cookies
+  include ReplicaReads
 
+  around_action :flush_database_query_stats, if: -> { DatabaseQueryStats.enabled? }
   before_action :detect_locust_request
 
   private
 
+  def flush_database_query_stats
+    yield
+  ensure
+    DatabaseQueryStats.flush
+  end
+
   def detect_locust_request
     ua = request.user_agent.to_s
 
@@ -49,6 +57,17 @@ class ApplicationController < ActionController::API
     current_user_from_token || current_user_from_session
   end
 
+  # History endpoints only read the archive tables when asked to.
+  def include_archived?
+    ActiveModel::Type::Boolean.new.cast(params[:includeArchived] || params[:include_archived]) || false
+  end
+
+  # For list payloads that are already plain hashes/arrays of strings, numbers,
+  # booleans and nil; same bytes as `render json:` without the as_json walk.
+  def render_fast_json(payload, status: :ok)
+    render json: FastJson.generate(payload), status: status
+  end
+
   def authenticate_user_with_token_or_session!
     @current_user = current_user_from_auth
     render json: { error: 'Unauthorized' }, status: :unauthorized unless @current_user
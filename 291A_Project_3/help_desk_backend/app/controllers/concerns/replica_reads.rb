@@ -0,0 +1,51 @@
+# Routes read-only endpoints to the reading role (the replica, when configured).
+#
+# A user who wrote something within the last STICKY_WINDOW keeps reading from
+# the primary so they always see their own messages despite replication lag.
+# Writes are recorded per user in Rails.cache, so stickiness holds across Puma
+# workers and hosts as long as the cache store is shared (Redis in production).
+module ReplicaReads
+  extend ActiveSupport::Concern
+
+  STICKY_WINDOW = 5.seconds
+
+  included do
+    after_action :record_user_write, unless: -> { request.get? || request.head? }
+  end
+
+  class_methods do
+    def reads_from_replica(only:)
+      around_action :read_from_replica, only: only
+    end
+  end
+
+  def self.last_write_key(user_id)
+    "replica_reads/last_write/#{user_id}"
+  end
+
+  private
+
+  def read_from_replica
+    user_id = user_id_hint
+    if user_id && Rails.cache.exist?(ReplicaReads.last_write_key(user_id))
+      yield
+    else
+      ApplicationRecord.connected_to(role: :reading) { yield }
+    end
+  end
+
+  def record_user_write
+    user_id = user_id_hint
+    return unless user_id && response.successful?
+
+    Rails.cache.write(ReplicaReads.last_write_key(user_id), true, expires_in: STICKY_WINDOW)
+  end
+
+  # Identifies the user from the JWT or session without touching the database;
+  # authentication proper still happens in the controllers.
+  def user_id_hint
+    token = request.headers['Authorization']&.split(' ')&.last
+    decoded = JwtService.decode(token) if token.present?
+    decoded&.dig(:user_id) || session[:user_id]
+  end
+end
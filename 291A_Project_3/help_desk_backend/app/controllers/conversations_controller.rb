@@ -1,10 +1,11 @@
 class ConversationsController < ApplicationController
   before_action :authenticate_user!
   before_action :set_conversation, only: [:show]
+  reads_from_replica only: [:index]
 
   def index
     @conversations = @current_user.initiated_conversations.or(@current_user.assigned_conversations).order(created_at: :desc)
-    render json: @conversations.map { |c| ConversationSerializer.for_user(c, viewer_id: @current_user.id) }, status: :ok
+    render_fast_json ConversationSerializer.collection_for_user(@conversations, viewer_id: @current_user.id)
   end
 
   def show
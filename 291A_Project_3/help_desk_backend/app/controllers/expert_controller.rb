@@ -1,5 +1,6 @@
 class ExpertController < ApplicationController
   before_action :require_authenticated_user
+  reads_from_replica only: [:queue]
 
   # GET /expert/profile
   def profile
@@ -40,17 +41,15 @@ class ExpertController < ApplicationController
     # Get waiting conversations (no assigned expert)
     waiting_conversations = Conversation.where(status: 'waiting')
                                         .order(created_at: :desc)
-                                        .map { |conv| ConversationSerializer.for_user(conv, viewer_id: @current_user.id) }
 
     # Get assigned conversations for this expert
     assigned_conversations = Conversation.where(assigned_expert_id: @current_user.id, status: 'active')
                                          .order(created_at: :desc)
-                                         .map { |conv| ConversationSerializer.for_user(conv, viewer_id: @current_user.id) }
 
-    render json: {
-      waitingConversations: waiting_conversations,
-      assignedConversations: assigned_conversations
-    }, status: :ok
+    render_fast_json({
+      waitingConversations: ConversationSerializer.collection_for_user(waiting_conversations, viewer_id: @current_user.id),
+      assignedConversations: ConversationSerializer.collection_for_user(assigned_conversations, viewer_id: @current_user.id)
+    })
   end
 
   # POST /expert/conversations/:conversation_id/claim
@@ -103,11 +102,15 @@ class ExpertController < ApplicationController
     render json: { errors: e.record.errors.full_messages }, status: :unprocessable_entity
   end
 
-  # GET /expert/assignments/history
+  # GET /expert/assignments/history?includeArchived=true
   def assignments_history
-    assignments = ExpertAssignment.where(expert_id: @current_user.id)
-                                  .order(assigned_at: :desc)
-                                  .map do |assignment|
+    assignments = ExpertAssignment.where(expert_id: @current_user.id).order(assigned_at: :desc).to_a
+    if include_archived?
+      assignments.concat(ArchivedExpertAssignment.where(expert_id: @current_user.id).to_a)
+      assignments.sort_by! { |assignment| -assignment.assigned_at.to_f }
+    end
+
+    assignments = assignments.map do |assignment|
       {
         id: assignment.id.to_s,
         conversationId: assignment.conversation_id.to_s,
@@ -1,13 +1,19 @@
 class MessagesController < ApplicationController
+  DEFAULT_PAGE_SIZE = 50
+  MAX_PAGE_SIZE = 200
+
   before_action :authenticate_user_with_token_or_session!
-  before_action :set_conversation_from_params, only: [:index, :create]
-  before_action :authorize_conversation_access!, only: [:index, :create]
+  before_action :set_conversation_from_params, only: [:index, :create, :mark_all_read]
+  before_action :authorize_conversation_access!, only: [:index, :create, :mark_all_read]
   before_action :set_message, only: [:mark_read]
   before_action :authorize_message_access!, only: [:mark_read]
+  reads_from_replica only: [:index]
 
+  # GET /conversations/:conversation_id/messages?before=<id>&after=<id>&limit=<n>&includeArchived=true
+  # Without any cursor params the full history is returned, as before.
   def index
-    messages = @conversation.messages.order(:created_at)
-    render json: messages.map { |msg| message_json(msg) }, status: :ok
+    messages = paginated? ? paginated_messages : collect_messages { |scope| scope.order(:id) }
+    render_fast_json messages
   end
 
   def create
@@ -25,12 +31,14 @@ class MessagesController < ApplicationController
     if message.save
       @conversation.update(last_message_at: message.created_at)
       
-      # Try to auto-respond from FAQ if this is an initiator message and expert is assigned
+      # Try to auto-respond from FAQ if this is an initiator message and expert is assigned.
+      # Runs on the faq_responses queue so the LLM call stays out of the request; the
+      # reply is not there yet when this responds and reaches clients via polling.
       if message.sender_role == 'initiator' && @conversation.assigned_expert_id.present?
-        AutoRespondFromFaqJob.perform_now(message.id)
+        AutoRespondFromFaqJob.perform_later(message.id)
       end
       
-      render json: message_json(message), status: :created
+      render json: MessageSerializer.for_message(message), status: :created
     else
       render json: { errors: message.errors.full_messages }, status: :unprocessable_entity
     end
@@ -48,6 +56,19 @@ class MessagesController < ApplicationController
     end
   end
 
+  # PUT /conversations/:conversation_id/messages/read?upToMessageId=<id>
+  # Marks every message the viewer didn't send (optionally only up to and
+  # including upToMessageId) as read with a single UPDATE.
+  def mark_all_read
+    unread = @conversation.messages.where(is_read: false).where.not(sender_id: @current_user.id)
+    up_to = params[:upToMessageId] || params[:up_to_message_id]
+    unread = unread.where("messages.id <= ?", up_to.to_i) if up_to.present?
+
+    now = Time.current
+    marked = unread.update_all(is_read: true, read_at: now, updated_at: now)
+    render json: { success: true, markedCount: marked }, status: :ok
+  end
+
   private
 
   def set_conversation_from_params
@@ -71,6 +92,39 @@ class MessagesController < ApplicationController
     end
   end
 
+  def paginated?
+    params[:before].present? || params[:after].present? || params[:limit].present?
+  end
+
+  # Cursor pagination over (conversation_id, id). `after` walks forward from the
+  # last seen message (oldest first); otherwise we take the newest page, optionally
+  # older than `before`. Pages are always returned in ascending id order.
+  def paginated_messages
+    limit = params[:limit].present? ? params[:limit].to_i.clamp(1, MAX_PAGE_SIZE) : DEFAULT_PAGE_SIZE
+    if params[:after].present?
+      after = params[:after].to_i
+      collect_messages { |scope| scope.where(id: (after + 1)..).order(:id).limit(limit) }.first(limit)
+    else
+      before = params[:before].to_i if params[:before].present?
+      page = collect_messages(descending: true) do |scope|
+        scope = scope.where(id: ...before) if before
+        scope.order(id: :desc).limit(limit)
+      end
+      page.first(limit).reverse
+    end
+  end
+
+  # Serializes the block's query against live messages and, with
+  # includeArchived, the same query against archived ones merged in by id.
+  def collect_messages(descending: false)
+    return MessageSerializer.collection(yield(@conversation.messages)) unless include_archived?
+
+    merged = [@conversation.messages, @conversation.archived_messages]
+             .flat_map { |scope| MessageSerializer.collection(yield(scope)) }
+             .sort_by { |message| message[:id].to_i }
+    descending ? merged.reverse : merged
+  end
+
   def set_message
     @message = Message.find_by(id: params[:id])
     unless @message
@@ -98,17 +152,4 @@ class MessagesController < ApplicationController
     params[:content] ||
       params[:message]&.[](:content)
   end
-
-  def message_json(message)
-    {
-      id: message.id.to_s,
-      conversationId: message.conversation_id.to_s,
-      senderId: message.sender_id.to_s,
-      senderUsername: message.sender.username,
-      senderRole: message.sender_role,
-      content: message.content,
-      timestamp: message.created_at.iso8601,
-      isRead: message.is_read
-    }
-  end
 end
\ No newline at end of file
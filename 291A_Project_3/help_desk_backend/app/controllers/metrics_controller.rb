@@ -0,0 +1,34 @@
+class MetricsController < ApplicationController
+  before_action :authorize_metrics_request!
+
+  # GET /metrics/conversation-cache
+  def conversation_cache
+    render json: ConversationSerializer.cache_stats, status: :ok
+  end
+
+  # GET /metrics/database
+  def database
+    render json: DatabaseQueryStats.snapshot, status: :ok
+  end
+
+  # GET /metrics/jobs
+  def jobs
+    render json: JobStats.snapshot, status: :ok
+  end
+
+  private
+
+  # With METRICS_TOKEN set, callers must send it as X-Metrics-Token. Without
+  # it the endpoints are only served outside production.
+  def authorize_metrics_request!
+    expected = ENV["METRICS_TOKEN"].presence
+    if expected
+      provided = request.headers["X-Metrics-Token"].to_s
+      return if ActiveSupport::SecurityUtils.secure_compare(provided, expected)
+
+      render json: { error: 'Unauthorized' }, status: :unauthorized
+    elsif Rails.env.production?
+      head :not_found
+    end
+  end
+end
@@ -1,6 +1,6 @@
 # app/jobs/auto_assign_expert_job.rb
 class AutoAssignExpertJob < ApplicationJob
-  queue_as :default
+  queue_as :assignment
 
   def perform(conversation_id)
     conversation = Conversation.find_by(id: conversation_id)
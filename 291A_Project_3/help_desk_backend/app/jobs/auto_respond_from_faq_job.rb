@@ -1,5 +1,5 @@
 class AutoRespondFromFaqJob < ApplicationJob
-  queue_as :default
+  queue_as :faq_responses
 
   def perform(message_id)
     message = Message.find_by(id: message_id)
@@ -0,0 +1,12 @@
+class DataRetentionJob < ApplicationJob
+  queue_as :maintenance
+
+  def perform
+    results = DataRetention.new.run
+    if results
+      Rails.logger.info("Data retention: " + results.map { |table, count| "#{table}=#{count}" }.join(" "))
+    else
+      Rails.logger.info("Data retention skipped: another run is in progress")
+    end
+  end
+end
@@ -1,17 +1,17 @@
 # app/jobs/generate_summary_job.rb
 class GenerateSummaryJob < ApplicationJob
-  queue_as :default
+  queue_as :summaries
 
   def perform(conversation_id)
     conversation = Conversation.find_by(id: conversation_id)
     return unless conversation
 
-    # Only generate if there are 1+ messages
-    message_count = conversation.messages.count
-    if message_count < 1
-      Rails.logger.info("Skipping summary generation for conversation #{conversation_id}: only #{message_count} message(s)")
+    # Only generate if there are 1+ messages (archived ones aren't sent to the LLM)
+    if conversation.messages.none?
+      Rails.logger.info("Skipping summary generation for conversation #{conversation_id}: no live messages")
       return
     end
+    message_count = conversation.total_message_count
 
     Rails.logger.info("Generating summary for conversation #{conversation_id} (#{message_count} messages)")
 
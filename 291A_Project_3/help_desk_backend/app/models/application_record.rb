@@ -1,3 +1,10 @@
 class ApplicationRecord < ActiveRecord::Base
   primary_abstract_class
+
+  # The reading role points at the replica when one is configured (DB_REPLICA_HOST),
+  # and falls back to the primary otherwise so ReplicaReads is always safe to use.
+  connects_to database: {
+    writing: :primary,
+    reading: configurations.configs_for(env_name: Rails.env, name: "primary_replica") ? :primary_replica : :primary
+  }
 end
@@ -0,0 +1,5 @@
+# Resolved assignments moved out of `expert_assignments` by DataRetention.
+class ArchivedExpertAssignment < ApplicationRecord
+  belongs_to :conversation
+  belongs_to :expert, class_name: 'User', foreign_key: 'expert_id'
+end
@@ -0,0 +1,6 @@
+# Messages moved out of `messages` by DataRetention. Same columns, plus the
+# archive_month partition key and archived_at.
+class ArchivedMessage < ApplicationRecord
+  belongs_to :conversation
+  belongs_to :sender, class_name: 'User', foreign_key: 'sender_id'
+end
@@ -3,12 +3,21 @@ class Conversation < ApplicationRecord
   belongs_to :assigned_expert, class_name: 'User', foreign_key: 'assigned_expert_id', optional: true
   has_many :messages, dependent: :destroy
   has_many :expert_assignments, dependent: :destroy
+  has_many :archived_messages, dependent: :delete_all
+  has_many :archived_expert_assignments, dependent: :delete_all
   STATUS_VALUES = %w[waiting active resolved].freeze
 
   validates :title, presence: true, length: { maximum: 255 }
   validates :status, presence: true, inclusion: {in: STATUS_VALUES}
   validates :initiator, presence: true
   before_validation :defaultstat, on: :create
+
+  # Live plus archived messages. message_count_at_summary is compared against
+  # this, so archiving old messages doesn't look like the count went down.
+  def total_message_count
+    messages.count + archived_messages.count
+  end
+
   private
 
   def defaultstat
@@ -1,3 +1,4 @@
 class Current < ActiveSupport::CurrentAttributes
   attribute :might_be_locust_request
-end
\ No newline at end of file
+  attribute :query_counts_by_database
+end
@@ -1,11 +1,109 @@
 class ConversationSerializer
+  CACHE_NAMESPACE = "serialized_conversation".freeze
+  CACHE_TTL = 1.hour
+  CACHE_HITS_KEY = "#{CACHE_NAMESPACE}/stats/hits".freeze
+  CACHE_MISSES_KEY = "#{CACHE_NAMESPACE}/stats/misses".freeze
+  # Summaries are checked on every request, so a generation job is queued at
+  # most once per conversation and message count within this window; a job
+  # that failed gets queued again once it has passed.
+  SUMMARY_RETRY_AFTER = 10.minutes
+
   def self.for_user(conversation, viewer_id:)
+    collection_for_user([conversation], viewer_id: viewer_id).first
+  end
+
+  # Serializes a list of conversations for one viewer. The viewer-independent
+  # fields come from Rails.cache in a single multi-get (keyed by id and
+  # updated_at); unreadCount is computed with one grouped query. The summary is
+  # not cached: it is decided on every request from the plucked summary
+  # columns and grouped message counts, so a placeholder never outlives the
+  # generated summary and a failed generation gets queued again. Relations are
+  # only plucked, so models are instantiated for cache misses only.
+  def self.collection_for_user(conversations, viewer_id:)
+    versions = cache_versions_for(conversations)
+    return [] if versions.empty?
+
+    ids = versions.map(&:first)
+    shared = shared_fields_for(conversations, versions)
+    unread_counts = unread_counts_for(ids, viewer_id)
+    message_counts = message_counts_for(ids)
+
+    versions.filter_map do |id, _updated_at, summary, message_count_at_summary|
+      fields = shared[id]
+      next unless fields # deleted between the pluck and the load
+
+      fields.merge(
+        unreadCount: unread_counts.fetch(id, 0),
+        summary: get_or_generate_summary(id, summary, message_count_at_summary, message_counts.fetch(id, 0))
+      )
+    end
+  end
+
+  def self.cache_stats
+    hits = Rails.cache.read(CACHE_HITS_KEY, raw: true).to_i
+    misses = Rails.cache.read(CACHE_MISSES_KEY, raw: true).to_i
+    lookups = hits + misses
+
+    {
+      hits: hits,
+      misses: misses,
+      hitRatio: lookups.zero? ? nil : (hits.to_f / lookups).round(4)
+    }
+  end
+
+  private
+
+  # v2: entries no longer carry the summary.
+  def self.cache_key_for(id, updated_at)
+    "#{CACHE_NAMESPACE}/v2/#{id}-#{updated_at&.utc&.to_fs(:usec)}"
+  end
+
+  # [[id, updated_at, summary, message_count_at_summary], ...] in the collection's order.
+  def self.cache_versions_for(conversations)
+    if conversations.is_a?(ActiveRecord::Relation)
+      conversations.pluck(:id, :updated_at, :summary, :message_count_at_summary)
+    else
+      conversations.map do |conversation|
+        [conversation.id, conversation.updated_at, conversation.summary, conversation.message_count_at_summary]
+      end
+    end
+  end
+
+  def self.shared_fields_for(conversations, versions)
+    keys = versions.to_h { |id, updated_at| [id, cache_key_for(id, updated_at)] }
+    cached = Rails.cache.read_multi(*keys.values)
+
+    result = keys.each_with_object({}) do |(id, key), fields|
+      fields[id] = cached[key] if cached.key?(key)
+    end
+    miss_ids = keys.keys - result.keys
+    if miss_ids.any?
+      records = records_for(conversations, miss_ids)
+      ActiveRecord::Associations::Preloader.new(records: records, associations: [:initiator, :assigned_expert]).call
+      # Written under each record's own updated_at in case it changed since the pluck.
+      entries = records.to_h do |conversation|
+        result[conversation.id] = shared_fields(conversation)
+        [cache_key_for(conversation.id, conversation.updated_at), result[conversation.id]]
+      end
+      Rails.cache.write_multi(entries, expires_in: CACHE_TTL)
+    end
+    record_cache_lookups(hits: keys.size - miss_ids.size, misses: miss_ids.size)
+
+    result
+  end
+
+  def self.records_for(conversations, ids)
+    if conversations.is_a?(ActiveRecord::Relation)
+      Conversation.where(id: ids).to_a
+    else
+      conversations.select { |conversation| ids.include?(conversation.id) }
+    end
+  end
+
+  def self.shared_fields(conversation)
     questioner = conversation.initiator
     assigned_expert = conversation.assigned_expert
 
-    # Get or generate summary
-    summary = get_or_generate_summary(conversation)
-
     {
       id: conversation.id.to_s,
       title: conversation.title,
@@ -16,50 +114,67 @@ class ConversationSerializer
       assignedExpertUsername: assigned_expert&.username,
       createdAt: conversation.created_at&.iso8601,
       updatedAt: conversation.updated_at&.iso8601,
-      lastMessageAt: conversation.last_message_at&.iso8601,
-      unreadCount: Message.where(
-        conversation_id: conversation.id,
-        is_read: false
-      ).where.not(sender_id: viewer_id).count,
-      summary: summary,
-      # message_count_at_summary: conversation.messages.count
+      lastMessageAt: conversation.last_message_at&.iso8601
     }
   end
 
-  private
+  def self.unread_counts_for(conversation_ids, viewer_id)
+    Message.where(conversation_id: conversation_ids, is_read: false)
+           .where.not(sender_id: viewer_id)
+           .group(:conversation_id)
+           .count
+  end
 
-  ## NOTE Here is a refrence to summary generation logic for bullet point three
-  def self.get_or_generate_summary(conversation)
-    current_message_count = conversation.messages.count
+  # Live plus archived messages per conversation (see Conversation#total_message_count),
+  # as two grouped counts for the whole list.
+  def self.message_counts_for(conversation_ids)
+    live = Message.where(conversation_id: conversation_ids).group(:conversation_id).count
+    archived = ArchivedMessage.where(conversation_id: conversation_ids).group(:conversation_id).count
+    live.merge(archived) { |_id, live_count, archived_count| live_count + archived_count }
+  end
+
+  def self.record_cache_lookups(hits:, misses:)
+    Rails.cache.increment(CACHE_HITS_KEY, hits) if hits.positive?
+    Rails.cache.increment(CACHE_MISSES_KEY, misses) if misses.positive?
+  end
 
+  ## NOTE Here is a refrence to summary generation logic for bullet point three
+  def self.get_or_generate_summary(conversation_id, summary, message_count_at_summary, current_message_count)
     # Not enough messages yet
     if current_message_count < 1
       return "Not enough messages for summary"
     end
 
     # Check if we need to generate/regenerate
-    needs_generation = should_generate_summary?(conversation, current_message_count)
+    needs_generation = should_generate_summary?(summary, message_count_at_summary, current_message_count)
 
     if needs_generation
       # Queue job to generate new summary
+      enqueue_summary_generation(conversation_id, current_message_count)
 
-      GenerateSummaryJob.perform_later(conversation.id) #changed
-      
       # Return existing summary if available, otherwise placeholder
-      return conversation.summary.presence || "Generating summary..."
+      return summary.presence || "Generating summary..."
     end
 
-    # Return cached summary
-    conversation.summary.presence || "Summary not available"
+    # Return stored summary
+    summary.presence || "Summary not available"
   end
 
-  def self.should_generate_summary?(conversation, current_message_count)
+  def self.should_generate_summary?(summary, message_count_at_summary, current_message_count)
     # No summary exists yet
-    return true if conversation.summary.blank?
+    return true if summary.blank?
 
     # Check if there have been 5+ new messages since last summary
-    messages_since_summary = current_message_count - (conversation.message_count_at_summary || 0)
-    
+    messages_since_summary = current_message_count - (message_count_at_summary || 0)
+
     messages_since_summary >= 5
   end
-end
\ No newline at end of file
+
+  def self.enqueue_summary_generation(conversation_id, message_count)
+    key = "#{CACHE_NAMESPACE}/summary_queued/#{conversation_id}-#{message_count}"
+    return if Rails.cache.exist?(key)
+
+    Rails.cache.write(key, true, expires_in: SUMMARY_RETRY_AFTER)
+    GenerateSummaryJob.perform_later(conversation_id)
+  end
+end
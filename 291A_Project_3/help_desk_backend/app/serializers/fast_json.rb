@@ -0,0 +1,30 @@
+# Encodes already-serialized payloads (hashes, arrays, strings, numbers,
+# booleans and nil only) straight through the json gem, or Oj when it is
+# bundled, skipping ActiveSupport's recursive as_json pass. The output is
+# byte-for-byte what `render json: payload` produces, including the escaping
+# of <, >, & and the JS line separators.
+module FastJson
+  ESCAPED_CHARS = {
+    "\u2028" => '\u2028',
+    "\u2029" => '\u2029',
+    "\u003e" => '\u003e',
+    "\u003c" => '\u003c',
+    "\u0026" => '\u0026'
+  }.freeze
+  ESCAPE_WITH_HTML_ENTITIES = /[\u2028\u2029><&]/u
+  ESCAPE_SEPARATORS_ONLY = /[\u2028\u2029]/u
+
+  def self.generate(payload)
+    json = defined?(Oj) ? Oj.dump(payload, mode: :compat) : JSON.generate(payload)
+    escape = escape_pattern
+    escape && json.match?(escape) ? json.gsub(escape, ESCAPED_CHARS) : json
+  end
+
+  def self.escape_pattern
+    if ActiveSupport.escape_html_entities_in_json
+      ESCAPE_WITH_HTML_ENTITIES
+    elsif !ActiveSupport.respond_to?(:escape_js_separators_in_json) || ActiveSupport.escape_js_separators_in_json
+      ESCAPE_SEPARATORS_ONLY
+    end
+  end
+end
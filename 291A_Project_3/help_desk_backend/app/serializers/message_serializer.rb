@@ -0,0 +1,43 @@
+class MessageSerializer
+  COLUMNS = %i[id conversation_id sender_id sender_role content is_read].freeze
+  # Formatted by MySQL so no Time objects are built per row. Matches
+  # `created_at.iso8601` because timestamps are stored and rendered in UTC.
+  TIMESTAMP_FORMAT = "'%Y-%m-%dT%H:%i:%sZ'".freeze
+
+  def self.for_message(message)
+    {
+      id: message.id.to_s,
+      conversationId: message.conversation_id.to_s,
+      senderId: message.sender_id.to_s,
+      senderUsername: message.sender.username,
+      senderRole: message.sender_role,
+      content: message.content,
+      timestamp: message.created_at.iso8601,
+      isRead: message.is_read
+    }
+  end
+
+  # Serializes a message (or archived message) relation in its own order
+  # without instantiating models: one pluck for the rows and one for the
+  # sender usernames.
+  def self.collection(messages)
+    timestamp = Arel.sql("DATE_FORMAT(#{messages.quoted_table_name}.created_at, #{TIMESTAMP_FORMAT})")
+    rows = messages.pluck(*COLUMNS, timestamp)
+    return [] if rows.empty?
+
+    usernames = User.where(id: rows.map { |row| row[2] }.uniq).pluck(:id, :username).to_h
+
+    rows.map do |id, conversation_id, sender_id, sender_role, content, is_read, timestamp|
+      {
+        id: id.to_s,
+        conversationId: conversation_id.to_s,
+        senderId: sender_id.to_s,
+        senderUsername: usernames.fetch(sender_id),
+        senderRole: sender_role,
+        content: content,
+        timestamp: timestamp,
+        isRead: is_read
+      }
+    end
+  end
+end
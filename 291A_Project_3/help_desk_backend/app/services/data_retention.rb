@@ -0,0 +1,199 @@
+# Keeps the append-only tables bounded. Each policy selects rows past its
+# retention age and either archives them into the month-partitioned
+# archived_* table or deletes them outright:
+#
+# - messages: read messages of resolved conversations, older than
+#   RETENTION_MESSAGES_DAYS (90). Unread ones stay so unreadCount is unchanged.
+# - expert_assignments: resolved assignments older than RETENTION_ASSIGNMENTS_DAYS (180).
+# - sessions: deleted once idle for RETENTION_SESSIONS_HOURS (24, the cookie's expire_after).
+#
+# Rows move in batches of RETENTION_BATCH_SIZE (500) by primary key, each in
+# its own short transaction, with RETENTION_PAUSE seconds (0.1) between
+# batches and at most RETENTION_MAX_BATCHES (200) per policy per run.
+#
+# A policy with `parents` walks those rows PARENT_BATCH_SIZE at a time and
+# only looks for candidates under them (messages of resolved conversations via
+# index_messages_on_conversation_id_and_created_at), instead of range-scanning
+# the whole table by created_at. The walk keeps a cursor in Rails.cache: a run
+# that stops at RETENTION_MAX_BATCHES resumes from there next time, and once a
+# pass reaches the end the next one starts PARENT_PASS_INTERVAL later, when
+# more messages have aged past the cutoff.
+class DataRetention
+  LOCK_NAME = "data_retention".freeze
+  PARENT_BATCH_SIZE = 100
+  PARENT_PASS_INTERVAL = 1.day
+
+  Policy = Struct.new(:table, :model, :archive_model, :max_age, :candidates, :parents, :parent_key, keyword_init: true)
+
+  def self.policies(env = ENV)
+    [
+      Policy.new(
+        table: "messages",
+        model: Message,
+        archive_model: ArchivedMessage,
+        max_age: env.fetch("RETENTION_MESSAGES_DAYS", 90).to_i.days,
+        candidates: ->(cutoff) { Message.where(is_read: true).where("created_at < ?", cutoff) },
+        parents: -> { Conversation.where(status: "resolved") },
+        parent_key: :conversation_id
+      ),
+      Policy.new(
+        table: "expert_assignments",
+        model: ExpertAssignment,
+        archive_model: ArchivedExpertAssignment,
+        max_age: env.fetch("RETENTION_ASSIGNMENTS_DAYS", 180).to_i.days,
+        candidates: ->(cutoff) { ExpertAssignment.where(status: "resolved").where("resolved_at < ?", cutoff) }
+      ),
+      Policy.new(
+        table: "sessions",
+        model: ActiveRecord::SessionStore::Session,
+        max_age: env.fetch("RETENTION_SESSIONS_HOURS", 24).to_i.hours,
+        candidates: ->(cutoff) { ActiveRecord::SessionStore::Session.where("updated_at < ?", cutoff) }
+      )
+    ]
+  end
+
+  def self.month_key(time)
+    time.utc.year * 100 + time.utc.month
+  end
+
+  def self.next_month_key(month)
+    month % 100 == 12 ? (month / 100 + 1) * 100 + 1 : month + 1
+  end
+
+  def initialize(policies: self.class.policies, batch_size: ENV.fetch("RETENTION_BATCH_SIZE", 500).to_i,
+                 pause: ENV.fetch("RETENTION_PAUSE", 0.1).to_f, max_batches: ENV.fetch("RETENTION_MAX_BATCHES", 200).to_i,
+                 now: Time.current)
+    @policies = policies
+    @batch_size = batch_size
+    @pause = pause
+    @max_batches = max_batches
+    @now = now
+    @partition_bounds = {}
+  end
+
+  # Returns rows moved or deleted per table, or nil if another run holds the lock.
+  def run
+    return unless connection.select_value("SELECT GET_LOCK(#{connection.quote(LOCK_NAME)}, 0)").to_i == 1
+
+    begin
+      @policies.to_h { |policy| [policy.table, apply(policy)] }
+    ensure
+      connection.select_value("SELECT RELEASE_LOCK(#{connection.quote(LOCK_NAME)})")
+    end
+  end
+
+  private
+
+  def connection
+    ApplicationRecord.connection
+  end
+
+  def apply(policy)
+    cutoff = @now - policy.max_age
+    @batches_left = @max_batches
+    return move_in_batches(policy, policy.candidates.call(cutoff)) unless policy.parents
+
+    cursor = Rails.cache.read(cursor_key(policy)) || {}
+    return 0 if cursor[:resume_after].nil? && cursor[:completed_at]&.after?(@now - PARENT_PASS_INTERVAL)
+
+    parents = policy.parents.call
+    parents = parents.where(parents.arel_table[:id].gt(cursor[:resume_after] || 0))
+    total = 0
+    stopped_at = nil
+    parents.in_batches(of: PARENT_BATCH_SIZE) do |batch|
+      parent_ids = batch.ids
+      candidates = policy.candidates.call(cutoff).where(policy.parent_key => parent_ids)
+      total += move_in_batches(policy, candidates)
+      next unless @batches_left.zero?
+
+      # Out of batches: redo this group next run unless it is finished.
+      stopped_at = candidates.exists? ? parent_ids.first - 1 : parent_ids.last
+      break
+    end
+    Rails.cache.write(cursor_key(policy), stopped_at ? { resume_after: stopped_at } : { completed_at: @now })
+    total
+  end
+
+  def cursor_key(policy)
+    "data_retention/#{policy.table}/cursor"
+  end
+
+  def move_in_batches(policy, candidates)
+    last_id = 0
+    total = 0
+
+    while @batches_left.positive?
+      ids = candidates.where(policy.model.arel_table[:id].gt(last_id)).order(:id).limit(@batch_size).pluck(:id)
+      break if ids.empty?
+
+      @batches_left -= 1
+      if policy.archive_model
+        archive_batch(policy, ids)
+      else
+        policy.model.where(id: ids).delete_all
+      end
+      total += ids.size
+      last_id = ids.last
+      break if ids.size < @batch_size
+
+      sleep(@pause) if @pause.positive?
+    end
+    total
+  end
+
+  def archive_batch(policy, ids)
+    source = policy.model
+    archive = policy.archive_model
+    month_sql = "YEAR(created_at) * 100 + MONTH(created_at)"
+    # Partition DDL commits implicitly, so it has to happen before the transaction.
+    ensure_partitions(archive.table_name, source.where(id: ids).distinct.pluck(Arel.sql(month_sql)))
+
+    columns = source.column_names.map { |column| connection.quote_column_name(column) }.join(", ")
+    ApplicationRecord.transaction do
+      connection.execute(<<~SQL)
+        INSERT INTO #{archive.quoted_table_name} (#{columns}, archive_month, archived_at)
+        SELECT #{columns}, #{month_sql}, #{connection.quote(@now)}
+        FROM #{source.quoted_table_name} WHERE id IN (#{ids.join(', ')})
+      SQL
+      source.where(id: ids).delete_all
+    end
+  end
+
+  # Splits one partition per missing month off the p_future catch-all, which
+  # stays empty so the reorganize doesn't copy any rows.
+  def ensure_partitions(table, months)
+    bound = partition_bound(table)
+    return if bound == :unpartitioned || months.empty?
+
+    first = bound || months.min
+    return if months.max < first
+
+    month = first
+    definitions = []
+    while month <= months.max
+      following = self.class.next_month_key(month)
+      definitions << "PARTITION p#{month} VALUES LESS THAN (#{following})"
+      month = following
+    end
+    definitions << "PARTITION p_future VALUES LESS THAN MAXVALUE"
+    connection.execute("ALTER TABLE #{connection.quote_table_name(table)} REORGANIZE PARTITION p_future INTO (#{definitions.join(', ')})")
+    @partition_bounds[table] = month
+  end
+
+  # First month not covered by a dedicated partition, nil if there are none
+  # yet, :unpartitioned for tables created from schema.rb.
+  def partition_bound(table)
+    return @partition_bounds[table] if @partition_bounds.key?(table)
+
+    descriptions = connection.select_values(<<~SQL)
+      SELECT PARTITION_DESCRIPTION FROM information_schema.PARTITIONS
+      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = #{connection.quote(table)} AND PARTITION_NAME IS NOT NULL
+    SQL
+    @partition_bounds[table] =
+      if descriptions.empty?
+        :unpartitioned
+      else
+        descriptions.reject { |description| description == "MAXVALUE" }.map(&:to_i).max
+      end
+  end
+end
@@ -0,0 +1,47 @@
+# Counts SQL statements per database config (primary vs. primary_replica) so the
+# load harness can see how polling traffic splits between the two.
+#
+# Counts are gathered per request in Current and flushed to Rails.cache once at
+# the end of the request, which keeps the totals shared across Puma workers.
+# The flush costs a cache write per request (a query with solid_cache), so the
+# whole thing is off unless DATABASE_QUERY_STATS=1.
+class DatabaseQueryStats
+  CACHE_PREFIX = "database_query_stats".freeze
+  IGNORED_NAMES = %w[SCHEMA TRANSACTION].freeze
+
+  def self.enabled?
+    ActiveModel::Type::Boolean.new.cast(ENV["DATABASE_QUERY_STATS"]) || false
+  end
+
+  def self.track(event)
+    payload = event.payload
+    return if payload[:cached] || IGNORED_NAMES.include?(payload[:name])
+
+    database = payload[:connection]&.pool&.db_config&.name
+    return unless database
+
+    counts = (Current.query_counts_by_database ||= Hash.new(0))
+    counts[database] += 1
+  end
+
+  def self.flush
+    counts = Current.query_counts_by_database
+    return if counts.blank?
+
+    # Reset first: with a database-backed cache store the increments below are queries too.
+    Current.query_counts_by_database = nil
+    counts.each { |database, count| Rails.cache.increment("#{CACHE_PREFIX}/#{database}", count) }
+  end
+
+  def self.snapshot
+    databases = ActiveRecord::Base.configurations.configs_for(env_name: Rails.env).map(&:name)
+    counts = databases.index_with { |database| Rails.cache.read("#{CACHE_PREFIX}/#{database}", raw: true).to_i }
+    total = counts.values.sum
+
+    {
+      enabled: enabled?,
+      queries: counts,
+      share: counts.transform_values { |count| total.zero? ? nil : (count.to_f / total).round(4) }
+    }
+  end
+end
@@ -0,0 +1,142 @@
+# Per-job counters for the load harness (GET /metrics/jobs): enqueues,
+# duplicate enqueues (same job and arguments while an identical one is still
+# waiting), queue latency (enqueue to start) and execution time as bucketed
+# histograms, plus the current depth and latency of every queue.
+#
+# Counters live in Rails.cache so the web and job processes share them; that
+# needs a shared store (Redis via REDIS_URL, or solid_cache). Every enqueue and
+# perform costs a few cache writes (queries with solid_cache), so the hooks are
+# off unless JOB_STATS=1.
+class JobStats
+  CACHE_PREFIX = "job_stats".freeze
+  JOBS = %w[AutoAssignExpertJob AutoRespondFromFaqJob GenerateSummaryJob DataRetentionJob].freeze
+  COUNTERS = %w[enqueued duplicates started performed failed].freeze
+  TIMINGS = { queue_latency: "queueLatency", execution: "execution" }.freeze
+  BUCKETS_MS = [100, 1_000, 5_000, 30_000, 60_000, 300_000].freeze
+  PENDING_TTL = 1.hour
+
+  def self.enabled?
+    ActiveModel::Type::Boolean.new.cast(ENV["JOB_STATS"]) || false
+  end
+
+  # Subscribes the counters to Active Job's instrumentation; returns the subscribers.
+  def self.subscribe
+    [
+      ActiveSupport::Notifications.subscribe("enqueue.active_job") do |event|
+        job = event.payload[:job]
+        enqueued(job) if job && event.payload[:exception_object].nil? && job.successfully_enqueued?
+      end,
+      ActiveSupport::Notifications.subscribe("perform_start.active_job") do |event|
+        started(event.payload[:job])
+      end,
+      ActiveSupport::Notifications.subscribe("perform.active_job") do |event|
+        performed(event.payload[:job], event.duration, failed: event.payload[:exception_object].present?)
+      end
+    ]
+  end
+
+  # The arguments digest is taken once, from the serialized arguments, and kept
+  # under the job_id; started() looks it up by job_id rather than re-deriving it
+  # from the deserialized arguments, which need not serialize the same way.
+  def self.enqueued(job)
+    name = job.class.name
+    increment(name, "enqueued")
+    digest = arguments_digest(job)
+    Rails.cache.write(pending_key(job), digest, expires_in: PENDING_TTL)
+    pending = Rails.cache.increment(pending_arguments_key(name, digest), 1, expires_in: PENDING_TTL)
+    increment(name, "duplicates") if pending.to_i > 1
+  end
+
+  def self.started(job)
+    # perform_now jobs were never enqueued.
+    return unless job.enqueued_at
+
+    name = job.class.name
+    increment(name, "started")
+    digest = Rails.cache.read(pending_key(job))
+    if digest
+      Rails.cache.delete(pending_key(job))
+      Rails.cache.decrement(pending_arguments_key(name, digest), 1)
+    end
+    observe(name, :queue_latency, (Time.current - job.enqueued_at) * 1000)
+  end
+
+  def self.performed(job, duration_ms, failed:)
+    name = job.class.name
+    increment(name, "performed")
+    increment(name, "failed") if failed
+    observe(name, :execution, duration_ms)
+  end
+
+  def self.snapshot
+    keys = JOBS.flat_map { |job| counter_names.map { |counter| key(job, counter) } }
+    values = Rails.cache.read_multi(*keys, raw: true)
+    read = ->(job, counter) { values[key(job, counter)].to_i }
+
+    jobs = JOBS.index_with do |job|
+      stats = COUNTERS.to_h { |counter| [counter.to_sym, read.call(job, counter)] }
+      TIMINGS.each do |timing, label|
+        stats[label.to_sym] = {
+          count: read.call(job, "#{timing}_count"),
+          msTotal: read.call(job, "#{timing}_ms_total"),
+          buckets: bucket_names.to_h { |bucket| [bucket, read.call(job, "#{timing}_#{bucket}")] }
+        }
+      end
+      stats
+    end
+
+    { enabled: enabled?, jobs: jobs, queues: queue_depths }
+  end
+
+  private
+
+  def self.key(job, counter)
+    "#{CACHE_PREFIX}/#{job}/#{counter}"
+  end
+
+  def self.pending_key(job)
+    "#{CACHE_PREFIX}/pending/#{job.job_id}"
+  end
+
+  def self.pending_arguments_key(job_name, digest)
+    "#{CACHE_PREFIX}/pending/#{job_name}/#{digest}"
+  end
+
+  def self.arguments_digest(job)
+    Digest::SHA256.hexdigest(ActiveJob::Arguments.serialize(job.arguments).to_json)[0, 16]
+  end
+
+  def self.bucket_names
+    BUCKETS_MS.map { |bound| "le#{bound}ms" } + ["gt#{BUCKETS_MS.last}ms"]
+  end
+
+  def self.counter_names
+    COUNTERS + TIMINGS.keys.flat_map { |timing| ["#{timing}_count", "#{timing}_ms_total"] + bucket_names.map { |b| "#{timing}_#{b}" } }
+  end
+
+  def self.increment(job, counter, amount = 1)
+    Rails.cache.increment(key(job, counter), amount)
+  end
+
+  def self.observe(job, timing, ms)
+    bound = BUCKETS_MS.find { |limit| ms <= limit }
+    increment(job, "#{timing}_count")
+    increment(job, "#{timing}_ms_total", ms.round)
+    increment(job, "#{timing}_#{bound ? "le#{bound}ms" : "gt#{BUCKETS_MS.last}ms"}")
+  end
+
+  def self.queue_depths
+    case ActiveJob::Base.queue_adapter_name
+    when "sidekiq"
+      require "sidekiq/api"
+      Sidekiq::Queue.all.to_h { |queue| [queue.name, { size: queue.size, latencySeconds: queue.latency.round(3) }] }
+    when "solid_queue"
+      SolidQueue::Queue.all.to_h { |queue| [queue.name, { size: queue.size, latencySeconds: queue.latency }] }
+    else
+      {}
+    end
+  rescue StandardError => e
+    Rails.logger.warn("JobStats: could not read queue depths: #{e.class} - #{e.message}")
+    {}
+  end
+end
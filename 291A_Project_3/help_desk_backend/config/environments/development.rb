@@ -23,8 +23,13 @@ Rails.application.configure do
     config.action_controller.perform_caching = true
   end
 
-  # Use memory store for development (in-memory caching)
-  config.cache_store = :memory_store, { size: 64.megabytes }
+  # Use memory store for development (in-memory caching). With REDIS_URL set the
+  # cache is shared, so /metrics counters cover every Puma worker and Sidekiq.
+  if ENV["REDIS_URL"].present?
+    config.cache_store = :redis_cache_store, { url: ENV["REDIS_URL"], namespace: "help_desk_backend" }
+  else
+    config.cache_store = :memory_store, { size: 64.megabytes }
+  end
 
   # Store uploaded files on the local file system (see config/storage.yml for options).
   config.active_storage.service = :local
@@ -0,0 +1,6 @@
+# Per-database query counters exposed at /metrics/database (see DatabaseQueryStats).
+if DatabaseQueryStats.enabled?
+  ActiveSupport::Notifications.subscribe("sql.active_record") do |event|
+    DatabaseQueryStats.track(event)
+  end
+end
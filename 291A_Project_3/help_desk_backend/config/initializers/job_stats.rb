@@ -0,0 +1,2 @@
+# Per-job enqueue/latency/execution counters exposed at /metrics/jobs (see JobStats).
+JobStats.subscribe if JobStats.enabled?
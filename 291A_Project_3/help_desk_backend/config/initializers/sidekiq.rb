@@ -4,9 +4,25 @@ redis_config = {
   network_timeout: 5
 }
 
+# Per-job queues, each in its own capsule so slow LLM jobs (summaries) can't
+# take every thread away from assignment and FAQ auto-responses. Every capsule
+# thread needs a database connection on top of the default capsule's.
+JOB_CAPSULES = {
+  "assignment" => ENV.fetch("JOB_ASSIGNMENT_CONCURRENCY", 3).to_i,
+  "faq_responses" => ENV.fetch("JOB_FAQ_CONCURRENCY", 2).to_i,
+  "summaries" => ENV.fetch("JOB_SUMMARY_CONCURRENCY", 2).to_i
+}.freeze
+
 # Configure Sidekiq server (the worker process)
 Sidekiq.configure_server do |config|
   config.redis = redis_config
+
+  JOB_CAPSULES.each do |queue, concurrency|
+    config.capsule(queue) do |capsule|
+      capsule.concurrency = concurrency
+      capsule.queues = [queue]
+    end
+  end
 end
 
 # Configure Sidekiq client (the Rails app enqueueing jobs)
@@ -28,6 +28,15 @@
 threads_count = ENV.fetch("RAILS_MAX_THREADS", 3)
 threads threads_count, threads_count
 
+# Cluster mode: fork WEB_CONCURRENCY workers. The app is preloaded in the master
+# so workers share copy-on-write memory; set PUMA_PRELOAD=0 to boot each worker
+# separately (used by the load harness configuration sweep).
+workers_count = Integer(ENV.fetch("WEB_CONCURRENCY", 1))
+if workers_count > 1
+  workers workers_count
+  preload_app! ENV.fetch("PUMA_PRELOAD", "1") == "1"
+end
+
 # Specifies the `port` that Puma will listen on to receive requests; default is 3000.
 port ENV.fetch("PORT", 3000)
 
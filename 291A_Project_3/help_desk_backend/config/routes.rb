@@ -34,6 +34,13 @@ Rails.application.routes.draw do
   end
 
 
+  # Load-test instrumentation
+  scope :metrics do
+    get "conversation-cache", to: "metrics#conversation_cache"
+    get "database", to: "metrics#database"
+    get "jobs", to: "metrics#jobs"
+  end
+
   scope :auth do
     post "register", to: "auth#register"
     post "login", to: "auth#login"
@@ -43,7 +50,11 @@ Rails.application.routes.draw do
   end
 
   resources :conversations, only:[:index, :show, :create] do
-    resources :messages, only:[:index]
+    resources :messages, only:[:index] do
+      collection do
+        put "read", to: "messages#mark_all_read"
+      end
+    end
   end
 
   resources :messages, only:[:create] do
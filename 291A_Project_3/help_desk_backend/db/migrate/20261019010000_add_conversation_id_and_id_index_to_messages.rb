@@ -0,0 +1,5 @@
+class AddConversationIdAndIdIndexToMessages < ActiveRecord::Migration[8.1]
+  def change
+    add_index :messages, [:conversation_id, :id]
+  end
+end
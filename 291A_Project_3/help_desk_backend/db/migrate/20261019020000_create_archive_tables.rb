@@ -0,0 +1,47 @@
+class CreateArchiveTables < ActiveRecord::Migration[8.1]
+  ARCHIVE_TABLES = %w[archived_messages archived_expert_assignments].freeze
+
+  def up
+    create_table :archived_messages, primary_key: [:id, :archive_month] do |t|
+      t.bigint :id, null: false
+      t.integer :archive_month, null: false
+      t.bigint :conversation_id, null: false
+      t.bigint :sender_id, null: false
+      t.string :sender_role, null: false
+      t.text :content, null: false
+      t.boolean :is_read, default: false, null: false
+      t.datetime :read_at
+      t.timestamps
+      t.datetime :archived_at, null: false
+    end
+    add_index :archived_messages, [:conversation_id, :id]
+
+    create_table :archived_expert_assignments, primary_key: [:id, :archive_month] do |t|
+      t.bigint :id, null: false
+      t.integer :archive_month, null: false
+      t.bigint :conversation_id, null: false
+      t.bigint :expert_id, null: false
+      t.string :status, null: false
+      t.datetime :assigned_at, null: false
+      t.datetime :resolved_at
+      t.integer :rating
+      t.timestamps
+      t.datetime :archived_at, null: false
+    end
+    add_index :archived_expert_assignments, [:expert_id, :assigned_at]
+    add_index :archived_expert_assignments, :conversation_id
+
+    # Range partitions on archive_month (YYYYMM). Only the catch-all exists up
+    # front; DataRetention splits a partition off it for every month before it
+    # archives rows into that month. Partitioned InnoDB tables can't have
+    # foreign keys, hence none here. schema.rb doesn't record partitioning, so
+    # databases loaded from it get plain tables, which DataRetention also handles.
+    ARCHIVE_TABLES.each do |table|
+      execute "ALTER TABLE #{table} PARTITION BY RANGE (archive_month) (PARTITION p_future VALUES LESS THAN MAXVALUE)"
+    end
+  end
+
+  def down
+    ARCHIVE_TABLES.each { |table| drop_table table }
+  end
+end
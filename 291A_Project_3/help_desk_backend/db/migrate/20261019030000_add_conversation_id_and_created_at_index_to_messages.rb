@@ -0,0 +1,5 @@
+class AddConversationIdAndCreatedAtIndexToMessages < ActiveRecord::Migration[8.1]
+  def change
+    add_index :messages, [:conversation_id, :created_at]
+  end
+end
@@ -0,0 +1,5 @@
+class AddStatusAndIdIndexToConversations < ActiveRecord::Migration[8.1]
+  def change
+    add_index :conversations, [:status, :id]
+  end
+end
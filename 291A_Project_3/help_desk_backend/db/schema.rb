@@ -10,7 +10,38 @@
 #
 # It's strongly recommended that you check this file into your version control system.
 
-ActiveRecord::Schema[8.1].define(version: 2025_12_02_003713) do
+ActiveRecord::Schema[8.1].define(version: 2026_10_19_040000) do
+  create_table "archived_expert_assignments", primary_key: ["id", "archive_month"], charset: "utf8mb4", collation: "utf8mb4_0900_ai_ci", force: :cascade do |t|
+    t.integer "archive_month", null: false
+    t.datetime "archived_at", null: false
+    t.datetime "assigned_at", null: false
+    t.bigint "conversation_id", null: false
+    t.datetime "created_at", null: false
+    t.bigint "expert_id", null: false
+    t.bigint "id", null: false
+    t.integer "rating"
+    t.datetime "resolved_at"
+    t.string "status", null: false
+    t.datetime "updated_at", null: false
+    t.index ["conversation_id"], name: "index_archived_expert_assignments_on_conversation_id"
+    t.index ["expert_id", "assigned_at"], name: "index_archived_expert_assignments_on_expert_id_and_assigned_at"
+  end
+
+  create_table "archived_messages", primary_key: ["id", "archive_month"], charset: "utf8mb4", collation: "utf8mb4_0900_ai_ci", force: :cascade do |t|
+    t.integer "archive_month", null: false
+    t.datetime "archived_at", null: false
+    t.text "content", null: false
+    t.bigint "conversation_id", null: false
+    t.datetime "created_at", null: false
+    t.bigint "id", null: false
+    t.boolean "is_read", default: false, null: false
+    t.datetime "read_at"
+    t.bigint "sender_id", null: false
+    t.string "sender_role", null: false
+    t.datetime "updated_at", null: false
+    t.index ["conversation_id", "id"], name: "index_archived_messages_on_conversation_id_and_id"
+  end
+
   create_table "conversations", charset: "utf8mb4", collation: "utf8mb4_0900_ai_ci", force: :cascade do |t|
     t.bigint "assigned_expert_id"
     t.datetime "created_at", null: false
@@ -23,6 +54,7 @@ ActiveRecord::Schema[8.1].define(version: 2025_12_02_003713) do
     t.datetime "updated_at", null: false
     t.index ["assigned_expert_id"], name: "index_conversations_on_assigned_expert_id"
     t.index ["initiator_id"], name: "index_conversations_on_initiator_id"
+    t.index ["status", "id"], name: "index_conversations_on_status_and_id"
   end
 
   create_table "expert_assignments", charset: "utf8mb4", collation: "utf8mb4_0900_ai_ci", force: :cascade do |t|
@@ -56,6 +88,8 @@ ActiveRecord::Schema[8.1].define(version: 2025_12_02_003713) do
     t.bigint "sender_id", null: false
     t.string "sender_role", null: false
     t.datetime "updated_at", null: false
+    t.index ["conversation_id", "created_at"], name: "index_messages_on_conversation_id_and_created_at"
+    t.index ["conversation_id", "id"], name: "index_messages_on_conversation_id_and_id"
     t.index ["conversation_id"], name: "index_messages_on_conversation_id"
     t.index ["sender_id"], name: "index_messages_on_sender_id"
   end
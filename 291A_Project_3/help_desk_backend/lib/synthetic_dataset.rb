@@ -0,0 +1,311 @@
+# Bulk generator for large synthetic datasets, used by the data-size scaling
+# benchmarks (loadtest/data_scaling.py) to see how the polling and queue
+# endpoints degrade as a deployment ages.
+#
+# Rows are appended with explicit ids through multi-row INSERTs (mode "insert")
+# or tab-separated files loaded with LOAD DATA LOCAL INFILE (mode "load_data",
+# needs local_infile enabled on the server). Models, validations and callbacks
+# are bypassed, so this must only run against throwaway databases.
+class SyntheticDataset
+  DISTRIBUTIONS = %w[fixed uniform geometric lognormal].freeze
+  MODES = %w[insert load_data].freeze
+  TABLES = %w[archived_messages archived_expert_assignments messages expert_assignments conversations expert_profiles users].freeze
+
+  Config = Struct.new(
+    :users, :experts, :conversations,
+    :messages_distribution, :messages_mean, :messages_sigma, :messages_max,
+    :read_ratio, :waiting_ratio, :resolved_ratio, :days,
+    :batch_size, :mode, :seed,
+    keyword_init: true
+  )
+
+  def self.config_from_env(env = ENV)
+    Config.new(
+      users: env.fetch("USERS", 10_000).to_i,
+      experts: env.fetch("EXPERTS", 100).to_i,
+      conversations: env.fetch("CONVERSATIONS", 50_000).to_i,
+      messages_distribution: env.fetch("MESSAGES_DIST", "lognormal"),
+      messages_mean: env.fetch("MESSAGES_MEAN", 12).to_f,
+      messages_sigma: env.fetch("MESSAGES_SIGMA", 1.0).to_f,
+      messages_max: env.fetch("MESSAGES_MAX", 2_000).to_i,
+      read_ratio: env.fetch("READ_RATIO", 0.9).to_f,
+      waiting_ratio: env.fetch("WAITING_RATIO", 0.1).to_f,
+      resolved_ratio: env.fetch("RESOLVED_RATIO", 0.6).to_f,
+      days: env.fetch("DAYS", 180).to_i,
+      batch_size: env.fetch("BATCH_SIZE", 5_000).to_i,
+      mode: env.fetch("MODE", "insert"),
+      seed: env.fetch("SEED", 1).to_i
+    )
+  end
+
+  # Empties every application table. Development/test only.
+  def self.truncate_all!(connection = ActiveRecord::Base.connection)
+    raise ArgumentError, "refusing to truncate tables in production" if Rails.env.production?
+
+    connection.execute("SET FOREIGN_KEY_CHECKS = 0")
+    TABLES.each { |table| connection.execute("TRUNCATE TABLE #{connection.quote_table_name(table)}") }
+  ensure
+    connection.execute("SET FOREIGN_KEY_CHECKS = 1")
+  end
+
+  def self.format_time(time)
+    time.utc.strftime("%Y-%m-%d %H:%M:%S.%6N")
+  end
+
+  attr_reader :config
+
+  def initialize(config, connection: ActiveRecord::Base.connection, output: $stdout)
+    @config = config
+    @connection = connection
+    @output = output
+    @rng = Random.new(config.seed)
+  end
+
+  def generate!
+    validate!
+    started = Process.clock_gettime(Process::CLOCK_MONOTONIC)
+    @now = Time.current.utc
+    @counts = Hash.new(0)
+
+    with_fast_inserts do
+      user_ids = insert_users
+      expert_ids = user_ids.first(config.experts)
+      initiator_ids = user_ids.drop(config.experts)
+      insert_expert_profiles(expert_ids)
+      insert_conversations(initiator_ids, expert_ids)
+      @sinks.each_value(&:finish)
+    end
+
+    elapsed = Process.clock_gettime(Process::CLOCK_MONOTONIC) - started
+    log("done in #{elapsed.round(1)}s: " + @counts.map { |table, count| "#{table}=#{count}" }.join(" "))
+    @counts
+  end
+
+  private
+
+  def validate!
+    raise ArgumentError, "MESSAGES_DIST must be one of #{DISTRIBUTIONS.join(', ')}" unless DISTRIBUTIONS.include?(config.messages_distribution)
+    raise ArgumentError, "MODE must be one of #{MODES.join(', ')}" unless MODES.include?(config.mode)
+    raise ArgumentError, "EXPERTS must be smaller than USERS" unless config.experts.positive? && config.experts < config.users
+    raise ArgumentError, "WAITING_RATIO + RESOLVED_RATIO must be <= 1" if config.waiting_ratio + config.resolved_ratio > 1
+  end
+
+  def with_fast_inserts
+    @sinks = {}
+    @connection.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+    yield
+  ensure
+    @connection.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+  end
+
+  def sink(table, columns)
+    @sinks[table] ||=
+      if config.mode == "load_data"
+        LoadDataSink.new(@connection, table, columns)
+      else
+        InsertSink.new(@connection, table, columns, config.batch_size)
+      end
+  end
+
+  def next_id(table)
+    @connection.select_value("SELECT COALESCE(MAX(id), 0) FROM #{@connection.quote_table_name(table)}").to_i + 1
+  end
+
+  def insert_users
+    # One shared digest: hashing a password per row would dominate the run time.
+    digest = BCrypt::Password.create("password", cost: BCrypt::Engine::MIN_COST)
+    users = sink("users", %w[id username password_digest last_active_at created_at updated_at])
+    first_id = next_id("users")
+
+    Array.new(config.users) do |i|
+      id = first_id + i
+      created_at = random_time_ago
+      users << [id, "synthetic_user_#{id}", digest, created_at, created_at, created_at]
+      @counts["users"] += 1
+      id
+    end
+  end
+
+  def insert_expert_profiles(expert_ids)
+    profiles = sink("expert_profiles", %w[id user_id bio knowledge_base_links created_at updated_at])
+    first_id = next_id("expert_profiles")
+
+    expert_ids.each_with_index do |user_id, i|
+      profiles << [first_id + i, user_id, "Synthetic expert #{user_id}", "[]", @now, @now]
+      @counts["expert_profiles"] += 1
+    end
+  end
+
+  def insert_conversations(initiator_ids, expert_ids)
+    conversations = sink("conversations", %w[id title status initiator_id assigned_expert_id last_message_at created_at updated_at])
+    assignments = sink("expert_assignments", %w[id conversation_id expert_id status assigned_at resolved_at rating created_at updated_at])
+    messages = sink("messages", %w[id conversation_id sender_id sender_role content is_read read_at created_at updated_at])
+    conversation_id = next_id("conversations")
+    assignment_id = next_id("expert_assignments")
+    message_id = next_id("messages")
+
+    config.conversations.times do |i|
+      initiator_id = initiator_ids.sample(random: @rng)
+      status = random_status
+      expert_id = status == "waiting" ? nil : expert_ids.sample(random: @rng)
+      created_at = random_time_ago
+      at = created_at
+
+      message_count.times do |n|
+        at = [at + @rng.rand(1..600), @now].min
+        from_expert = expert_id && n.odd?
+        read = @rng.rand < config.read_ratio
+        messages << [
+          message_id, conversation_id,
+          from_expert ? expert_id : initiator_id, from_expert ? "expert" : "initiator",
+          "Synthetic message #{message_id}", read, read ? at : nil, at, at
+        ]
+        message_id += 1
+        @counts["messages"] += 1
+      end
+      last_message_at = at == created_at ? nil : at
+
+      conversations << [conversation_id, "Synthetic conversation #{conversation_id}", status, initiator_id, expert_id,
+                        last_message_at, created_at, last_message_at || created_at]
+      @counts["conversations"] += 1
+
+      if expert_id
+        resolved = status == "resolved"
+        resolved_at = resolved ? (last_message_at || created_at) : nil
+        assignments << [assignment_id, conversation_id, expert_id, resolved ? "resolved" : "active", created_at,
+                        resolved_at, resolved ? @rng.rand(1..5) : nil, created_at, resolved_at || created_at]
+        assignment_id += 1
+        @counts["expert_assignments"] += 1
+      end
+
+      conversation_id += 1
+      log("#{i + 1} conversations, #{@counts['messages']} messages") if ((i + 1) % 100_000).zero?
+    end
+  end
+
+  def random_status
+    r = @rng.rand
+    if r < config.waiting_ratio
+      "waiting"
+    elsif r < config.waiting_ratio + config.resolved_ratio
+      "resolved"
+    else
+      "active"
+    end
+  end
+
+  def random_time_ago
+    @now - @rng.rand(config.days * 86_400)
+  end
+
+  def message_count
+    mean = config.messages_mean
+    count =
+      case config.messages_distribution
+      when "fixed" then mean
+      when "uniform" then @rng.rand(0..(2 * mean).round)
+      # Number of failures before the first success, with p chosen so the mean matches.
+      when "geometric" then Math.log(1 - @rng.rand) / Math.log(1 - 1.0 / (mean + 1))
+      when "lognormal"
+        sigma = config.messages_sigma
+        Math.exp(Math.log([mean, 1].max) - sigma**2 / 2 + sigma * gaussian)
+      end
+    count.round.clamp(0, config.messages_max)
+  end
+
+  def gaussian
+    Math.sqrt(-2 * Math.log(1 - @rng.rand)) * Math.cos(2 * Math::PI * @rng.rand)
+  end
+
+  def log(line)
+    @output.puts("[synthetic] #{line}")
+  end
+
+  # Buffers rows and flushes them as one multi-row INSERT per batch.
+  class InsertSink
+    def initialize(connection, table, columns, batch_size)
+      @connection = connection
+      @batch_size = batch_size
+      @prefix = "INSERT INTO #{connection.quote_table_name(table)} (#{columns.join(', ')}) VALUES "
+      @rows = []
+    end
+
+    def <<(row)
+      @rows << "(#{row.map { |value| quote(value) }.join(',')})"
+      flush if @rows.size >= @batch_size
+    end
+
+    def finish
+      flush
+    end
+
+    private
+
+    def flush
+      return if @rows.empty?
+
+      @connection.execute(@prefix + @rows.join(","))
+      @rows.clear
+    end
+
+    def quote(value)
+      case value
+      when nil then "NULL"
+      when true then "1"
+      when false then "0"
+      when Integer then value.to_s
+      when Time then "'#{SyntheticDataset.format_time(value)}'"
+      else @connection.quote(value)
+      end
+    end
+  end
+
+  # Streams rows to a tab-separated file and loads it in one LOAD DATA statement.
+  class LoadDataSink
+    def initialize(connection, table, columns)
+      @connection = connection
+      @table = table
+      @columns = columns
+      @path = Rails.root.join("tmp", "synthetic", "#{table}.tsv")
+      FileUtils.mkdir_p(@path.dirname)
+      @file = File.open(@path, "w")
+    end
+
+    def <<(row)
+      @file.write(row.map { |value| encode(value) }.join("\t"), "\n")
+    end
+
+    def finish
+      @file.close
+      client = Mysql2::Client.new(**client_config)
+      client.query("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+      client.query(<<~SQL)
+        LOAD DATA LOCAL INFILE '#{client.escape(@path.to_s)}'
+        INTO TABLE #{@connection.quote_table_name(@table)}
+        FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+        (#{@columns.join(', ')})
+      SQL
+    ensure
+      client&.close
+      File.delete(@path) if File.exist?(@path)
+    end
+
+    private
+
+    def client_config
+      @connection.pool.db_config.configuration_hash
+                 .slice(:host, :port, :username, :password, :database, :socket, :encoding)
+                 .merge(local_infile: true)
+    end
+
+    def encode(value)
+      case value
+      when nil then "\\N"
+      when true then "1"
+      when false then "0"
+      when Time then SyntheticDataset.format_time(value)
+      else value.to_s.gsub(/[\\\t\n]/, "\\" => "\\\\", "\t" => "\\t", "\n" => "\\n")
+      end
+    end
+  end
+end
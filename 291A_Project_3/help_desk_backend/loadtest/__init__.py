@@ -0,0 +1,7 @@
+"""
+Load-test harness tooling for the help desk backend.
+
+The locust scenario itself lives in ../locustfile.py; the modules here drive
+it (configuration sweeps, result collection) and are run from the
+help_desk_backend directory, e.g. `python -m loadtest.sweep --help`.
+"""
@@ -0,0 +1,142 @@
+"""
+Data-size scaling benchmark.
+
+Grows the database through a series of sizes with `bin/rails synthetic:generate`
+and runs the same locust scenario after each step, then reports (and, when
+matplotlib is installed, plots) per-endpoint latency against data size.
+
+Run from help_desk_backend/ against a throwaway development database:
+
+    python -m loadtest.data_scaling --sizes 10000,100000,1000000 --reset --run-time 3m
+
+Sizes are conversation counts; users and experts scale with them
+(--users-per-conversation, --conversations-per-expert). Each step only
+appends the difference to the previous size.
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+
+from loadtest import stats
+from loadtest.sweep import Backend, Combination, run_locust
+
+RESULT_FIELDS = ["conversations", "endpoint", "method", "name", "requests", "p50_ms", "p99_ms", "error_rate"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Conversation counts, ascending")
+    parser.add_argument("--reset", action="store_true", help="Truncate application tables before the first size")
+    parser.add_argument("--users-per-conversation", type=float, default=0.2)
+    parser.add_argument("--conversations-per-expert", type=int, default=500)
+    parser.add_argument("--messages-dist", default="lognormal")
+    parser.add_argument("--messages-mean", type=float, default=12)
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument("--waiting-ratio", type=float, default=0.1)
+    parser.add_argument("--mode", default="insert", choices=["insert", "load_data"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=3)
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--rails-env", default="development")
+    parser.add_argument("--locustfile", default="locustfile.py")
+    parser.add_argument("--step-duration", type=int, default=30)
+    parser.add_argument("--run-time", default="3m", help="locust --run-time per dataset size")
+    parser.add_argument("--boot-timeout", type=int, default=120)
+    parser.add_argument("--no-sidekiq", action="store_true")
+    parser.add_argument("--out", default="tmp/loadtest/data_scaling")
+    return parser.parse_args(argv)
+
+
+def rails(args, task, env=None):
+    subprocess.run(["bin/rails", task], env=dict(os.environ, RAILS_ENV=args.rails_env, **(env or {})), check=True)
+
+
+def grow_dataset(args, conversations):
+    """Append `conversations` conversations plus proportional users and experts."""
+    users = max(2, int(conversations * args.users_per_conversation))
+    experts = max(1, min(users - 1, conversations // args.conversations_per_expert))
+    rails(args, "synthetic:generate", {
+        "USERS": str(users),
+        "EXPERTS": str(experts),
+        "CONVERSATIONS": str(conversations),
+        "MESSAGES_DIST": args.messages_dist,
+        "MESSAGES_MEAN": str(args.messages_mean),
+        "READ_RATIO": str(args.read_ratio),
+        "WAITING_RATIO": str(args.waiting_ratio),
+        "MODE": args.mode,
+        "SEED": str(conversations),
+    })
+
+
+def size_results(size, stats_csv):
+    """One results row per endpoint (method and name) of the locust run at `size` conversations."""
+    return [{"conversations": size, "endpoint": endpoint, "method": totals["type"], "name": totals["name"],
+             "requests": totals["requests"], "p50_ms": totals["p50"], "p99_ms": totals["p99"],
+             "error_rate": round(totals["error_rate"], 4)}
+            for endpoint, totals in stats.read_totals(stats_csv).items()]
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed; skipping plot (results.csv has the data)")
+        return
+
+    fig, (ax50, ax99) = plt.subplots(1, 2, figsize=(14, 6))
+    for endpoint in sorted({r["endpoint"] for r in results}):
+        points = sorted((r["conversations"], r["p50_ms"], r["p99_ms"]) for r in results if r["endpoint"] == endpoint)
+        sizes = [p[0] for p in points]
+        ax50.plot(sizes, [p[1] for p in points], marker="o", label=endpoint)
+        ax99.plot(sizes, [p[2] for p in points], marker="o", label=endpoint)
+    for ax, title in ((ax50, "p50 latency"), (ax99, "p99 latency")):
+        ax.set_xscale("log")
+        ax.set_xlabel("conversations in database")
+        ax.set_ylabel("ms")
+        ax.set_title(title)
+    ax99.legend(fontsize="small", loc="upper left")
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"plot written to {path}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    os.makedirs(args.out, exist_ok=True)
+    if args.reset:
+        rails(args, "synthetic:reset")
+
+    combination = Combination(args.workers, args.threads, args.threads, 5, args.workers > 1)
+    results = []
+    current = 0
+    for size in sizes:
+        grow_dataset(args, size - current)
+        current = size
+
+        run_dir = os.path.join(args.out, f"conversations-{size}")
+        os.makedirs(run_dir, exist_ok=True)
+        print(f"running scenario at {size} conversations", flush=True)
+        with Backend(combination, args, run_dir):
+            csv_prefix = run_locust(args, run_dir)
+
+        results.extend(size_results(size, f"{csv_prefix}_stats.csv"))
+
+    with open(os.path.join(args.out, "results.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    for row in sorted(results, key=lambda r: (r["endpoint"], r["conversations"])):
+        print("%-45s %10d %10.0f %10.0f" % (row["endpoint"], row["conversations"], row["p50_ms"], row["p99_ms"]))
+    plot(results, os.path.join(args.out, "latency_vs_size.png"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
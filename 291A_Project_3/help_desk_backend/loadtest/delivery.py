@@ -0,0 +1,202 @@
+"""
+End-to-end message delivery latency tracking.
+
+Senders embed a send ID and their send time in the message content; receiving
+personas pass every message they observe to DeliveryTracker.observe, which
+records how long the message took to become visible to the other participant.
+
+Latencies are bucketed per load step (same step length as StepLoadShape),
+per delivery channel and per message kind:
+
+- channel: "updates_poll" (/api/messages/updates) or "history_fetch"
+  (/conversations/:id/messages). The backend has no push delivery yet; a
+  "push" channel can be recorded the same way once it does.
+- kind: "user" for tagged messages sent by a persona, "faq_auto_response" for
+  untagged expert messages created by AutoRespondFromFaqJob. Those carry no
+  tag, so their latency is measured from the server `timestamp`, which only
+  has one-second resolution. POST /messages only enqueues the job (it used to
+  run inline and the reply existed before the request returned), and the
+  timestamp is taken when the job saves the reply, so this latency covers
+  polling only. The time from the initiator's message to the reply (queue
+  wait plus the LLM call) is the AutoRespondFromFaqJob queue latency and
+  execution time at /metrics/jobs.
+
+In a distributed run every worker ships its histograms to the master when it
+stops; only the master (or a local runner) writes the CSV, summed over workers.
+"""
+
+import csv
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+TAG_PATTERN = re.compile(r"\[e2e:(?P<send_id>[0-9a-f]+):(?P<sent_ms>\d+)\]")
+BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+MAX_TRACKED_DELIVERIES = 200000
+MESSAGE_TYPE = "delivery_histograms"
+
+
+def tag_content(content):
+    """Append a delivery tag to `content`; returns (tagged_content, send_id)."""
+    send_id = uuid.uuid4().hex[:12]
+    return f"{content} [e2e:{send_id}:{int(time.time() * 1000)}]", send_id
+
+
+def parse_tag(content):
+    """Return (send_id, sent_epoch_ms) for tagged content, else None."""
+    match = TAG_PATTERN.search(content or "")
+    if not match:
+        return None
+    return match.group("send_id"), int(match.group("sent_ms"))
+
+
+def _server_time_ms(timestamp):
+    try:
+        return int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() * 1000)
+    except (AttributeError, ValueError):
+        return None
+
+
+class DeliveryTracker:
+    def __init__(self, step_duration):
+        self.step_duration = step_duration
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.delivered = OrderedDict()
+        self.histograms = {}
+
+    def start(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.delivered.clear()
+            self.histograms.clear()
+
+    def observe(self, messages, receiver_id, channel):
+        """
+        Record the first sighting of each message sent by someone else.
+        Returns a list of (kind, latency_ms) for newly delivered messages.
+        """
+        now_ms = int(time.time() * 1000)
+        receiver_id = str(receiver_id)
+        deliveries = []
+
+        for message in messages or []:
+            if message.get("senderId") == receiver_id:
+                continue
+
+            tag = parse_tag(message.get("content"))
+            if tag:
+                key, sent_ms, kind = tag[0], tag[1], "user"
+            elif message.get("senderRole") == "expert":
+                key, sent_ms, kind = f"msg-{message.get('id')}", _server_time_ms(message.get("timestamp")), "faq_auto_response"
+            else:
+                continue
+            # Skip history left over from earlier runs (with slack for second-resolution timestamps).
+            if sent_ms is None or sent_ms < (self.started_at - 1) * 1000:
+                continue
+
+            with self.lock:
+                if (key, receiver_id) in self.delivered:
+                    continue
+                self.delivered[(key, receiver_id)] = True
+                if len(self.delivered) > MAX_TRACKED_DELIVERIES:
+                    self.delivered.popitem(last=False)
+
+                latency_ms = max(0, now_ms - sent_ms)
+                self._record(now_ms / 1000.0, channel, kind, latency_ms)
+            deliveries.append((kind, latency_ms))
+        return deliveries
+
+    def _record(self, observed_at, channel, kind, latency_ms):
+        step = int((observed_at - self.started_at) // self.step_duration)
+        histogram = self.histograms.setdefault((step, channel, kind), [0] * (len(BUCKETS_MS) + 1))
+        for index, bound in enumerate(BUCKETS_MS):
+            if latency_ms <= bound:
+                histogram[index] += 1
+                return
+        histogram[-1] += 1
+
+    def export(self):
+        """Histograms as a JSON-friendly list of [step, channel, kind, counts]."""
+        with self.lock:
+            return [[step, channel, kind, list(counts)] for (step, channel, kind), counts in self.histograms.items()]
+
+    def merge(self, entries):
+        """Add histograms produced by export() (e.g. from a worker) to this tracker."""
+        with self.lock:
+            for step, channel, kind, counts in entries:
+                histogram = self.histograms.setdefault((step, channel, kind), [0] * (len(BUCKETS_MS) + 1))
+                for index, count in enumerate(counts):
+                    histogram[index] += count
+
+    def rows(self):
+        """One dict per (step, channel, kind) with bucket counts and approximate percentiles."""
+        with self.lock:
+            items = sorted(self.histograms.items())
+        rows = []
+        for (step, channel, kind), counts in items:
+            row = {"step": step, "channel": channel, "kind": kind, "count": sum(counts),
+                   "p50_ms": _percentile(counts, 0.50), "p99_ms": _percentile(counts, 0.99)}
+            for bound, count in zip(BUCKETS_MS, counts):
+                row[f"le_{bound}ms"] = count
+            row["gt_%dms" % BUCKETS_MS[-1]] = counts[-1]
+            rows.append(row)
+        return rows
+
+    def write_csv(self, path):
+        rows = self.rows()
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def format_summary(self):
+        lines = ["%-5s %-14s %-18s %8s %10s %10s" % ("step", "channel", "kind", "count", "p50_ms<=", "p99_ms<=")]
+        for row in self.rows():
+            lines.append("%-5d %-14s %-18s %8d %10s %10s" % (
+                row["step"], row["channel"], row["kind"], row["count"], row["p50_ms"], row["p99_ms"]))
+        return "\n".join(lines)
+
+
+def install(environment, tracker, csv_path):
+    """
+    Report the tracker's histograms when the test stops: workers send them to
+    the master, which merges them and writes `csv_path` once for the whole run.
+    """
+    from locust.runners import MasterRunner, WorkerRunner
+
+    runner = environment.runner
+    if isinstance(runner, MasterRunner):
+        runner.register_message(MESSAGE_TYPE, lambda environment, msg, **kwargs: tracker.merge(msg.data))
+
+    def on_test_stop(environment, **kwargs):
+        if isinstance(runner, WorkerRunner):
+            # Sent before the worker reports client_stopped, so it reaches the
+            # master before the master's own test_stop fires.
+            runner.send_message(MESSAGE_TYPE, tracker.export())
+            return
+        tracker.write_csv(csv_path)
+        print(tracker.format_summary())
+
+    environment.events.test_stop.add_listener(on_test_stop)
+
+
+def _percentile(counts, pct):
+    """Upper bucket bound containing the pct-th observation ('inf' for overflow)."""
+    total = sum(counts)
+    if not total:
+        return None
+    threshold = pct * total
+    running = 0
+    for bound, count in zip(BUCKETS_MS + [float("inf")], counts):
+        running += count
+        if running >= threshold:
+            return bound
+    return float("inf")
@@ -0,0 +1,234 @@
+"""
+Load-generator self-monitoring.
+
+Every locust process (local, master and each worker) samples itself once a
+second from a greenlet: CPU (psutil, which locust already depends on),
+event-loop lag (how late the greenlet wakes up past its one-second sleep) and
+the number of running user greenlets. Workers ship their samples to the
+master; the master or local runner buckets them per load step (same step
+length as StepLoadShape) and marks a step invalid when any generator process
+was saturated for too much of it, since response times measured by a starved
+gevent loop include the generator's own queueing.
+
+Optionally, with --master, WorkerAutoscaler starts local worker processes
+(LOCUST_AUTOSCALE_MIN_WORKERS up front, up to LOCUST_AUTOSCALE_MAX_WORKERS)
+whenever the workers' average CPU runs out of headroom. Locust only hands
+users to a worker that connects mid-run when rebalancing is on, so enabling
+autoscaling also turns on --enable-rebalancing for the master.
+"""
+
+import csv
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import gevent
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MESSAGE_TYPE = "generator_health"
+SAMPLE_INTERVAL = 1.0
+CSV_COLUMNS = ["step", "worker", "samples", "cpu_mean", "cpu_max", "lag_p95_ms", "lag_max_ms",
+               "user_greenlets_max", "saturated"]
+
+
+class GeneratorMonitor:
+    """
+    Collects samples from every generator process and summarizes them per
+    (step, worker). A process is saturated in a step when at least
+    `saturated_fraction` of its samples exceed the CPU or loop-lag threshold.
+    """
+
+    def __init__(self, step_duration, cpu_threshold=90.0, lag_threshold_ms=100.0, saturated_fraction=0.2):
+        self.step_duration = step_duration
+        self.cpu_threshold = cpu_threshold
+        self.lag_threshold_ms = lag_threshold_ms
+        self.saturated_fraction = saturated_fraction
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.samples = {}
+        self.latest = {}
+
+    def start(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.samples.clear()
+            self.latest.clear()
+
+    def record(self, worker, sample):
+        with self.lock:
+            self.latest.setdefault(worker, []).append(sample)
+            del self.latest[worker][:-30]
+            if self.started_at is None or sample["t"] < self.started_at:
+                return
+            step = int((sample["t"] - self.started_at) // self.step_duration)
+            self.samples.setdefault((step, worker), []).append(sample)
+
+    def _saturated(self, sample):
+        cpu = sample.get("cpu")
+        return (cpu is not None and cpu >= self.cpu_threshold) or sample["lag_ms"] >= self.lag_threshold_ms
+
+    def rows(self):
+        with self.lock:
+            items = sorted(self.samples.items())
+        rows = []
+        for (step, worker), samples in items:
+            cpu = [s["cpu"] for s in samples if s.get("cpu") is not None]
+            lag = sorted(s["lag_ms"] for s in samples)
+            saturated = sum(1 for s in samples if self._saturated(s)) >= self.saturated_fraction * len(samples)
+            rows.append({
+                "step": step,
+                "worker": worker,
+                "samples": len(samples),
+                "cpu_mean": round(sum(cpu) / len(cpu), 1) if cpu else "",
+                "cpu_max": round(max(cpu), 1) if cpu else "",
+                "lag_p95_ms": round(lag[int((len(lag) - 1) * 0.95)], 1),
+                "lag_max_ms": round(lag[-1], 1),
+                "user_greenlets_max": max(s["user_greenlets"] for s in samples),
+                "saturated": int(saturated),
+            })
+        return rows
+
+    def invalid_steps(self):
+        return sorted({row["step"] for row in self.rows() if row["saturated"]})
+
+    def average_cpu(self, window=5, exclude=("master",)):
+        """Mean CPU over the last `window` samples of each worker, averaged across workers."""
+        with self.lock:
+            per_worker = [[s["cpu"] for s in samples[-window:] if s.get("cpu") is not None]
+                          for worker, samples in self.latest.items() if worker not in exclude]
+        means = [sum(cpu) / len(cpu) for cpu in per_worker if cpu]
+        return sum(means) / len(means) if means else None
+
+    def write_csv(self, path):
+        rows = self.rows()
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def format_summary(self):
+        invalid = self.invalid_steps()
+        lines = ["%-5s %-34s %8s %8s %10s %10s" % ("step", "worker", "cpu_max", "lag_p95", "greenlets", "saturated")]
+        for row in self.rows():
+            lines.append("%-5d %-34s %8s %8s %10d %10s" % (
+                row["step"], row["worker"][:34], row["cpu_max"], row["lag_p95_ms"], row["user_greenlets_max"],
+                "yes" if row["saturated"] else ""))
+        lines.append("invalid steps (generator saturated): " + (", ".join(map(str, invalid)) if invalid else "none"))
+        return "\n".join(lines)
+
+
+class HealthSampler:
+    """Samples the current process once a second from a greenlet and passes each sample to `on_sample`."""
+
+    def __init__(self, environment, on_sample, interval=SAMPLE_INTERVAL):
+        self.environment = environment
+        self.on_sample = on_sample
+        self.interval = interval
+        self.greenlet = None
+
+    def start(self):
+        if self.greenlet is None:
+            self.greenlet = gevent.spawn(self._loop)
+
+    def _user_greenlets(self):
+        greenlets = getattr(self.environment.runner, "user_greenlets", None)
+        return len(greenlets) if greenlets is not None else 0
+
+    def _loop(self):
+        process = psutil.Process() if psutil else None
+        if process:
+            process.cpu_percent(None)
+        expected = time.monotonic() + self.interval
+        while True:
+            gevent.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - expected) * 1000)
+            expected = now + self.interval
+            self.on_sample({
+                "t": time.time(),
+                "cpu": process.cpu_percent(None) if process else None,
+                "lag_ms": lag_ms,
+                "user_greenlets": self._user_greenlets(),
+            })
+
+
+class WorkerAutoscaler:
+    """Starts local `locust --worker` processes while the workers' average CPU is above `cpu_limit`."""
+
+    def __init__(self, environment, monitor, locustfile, min_workers, max_workers, cpu_limit=75.0, cooldown=15.0):
+        self.environment = environment
+        self.monitor = monitor
+        self.locustfile = locustfile
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.cpu_limit = cpu_limit
+        self.cooldown = cooldown
+        self.processes = []
+        self.last_spawn = 0.0
+
+    def start(self):
+        for _ in range(self.min_workers):
+            self.spawn()
+        gevent.spawn(self._loop)
+
+    def spawn(self):
+        options = self.environment.parsed_options
+        command = [sys.executable, "-m", "locust", "-f", self.locustfile, "--worker",
+                   "--master-host", "127.0.0.1", "--master-port", str(options.master_bind_port)]
+        self.processes.append(subprocess.Popen(command))
+        self.last_spawn = time.monotonic()
+        print(f"[generator] started local worker {len(self.processes)}/{self.max_workers}", flush=True)
+
+    def stop(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+
+    def _loop(self):
+        while True:
+            gevent.sleep(SAMPLE_INTERVAL * 5)
+            if len(self.processes) >= self.max_workers or time.monotonic() - self.last_spawn < self.cooldown:
+                continue
+            cpu = self.monitor.average_cpu()
+            if cpu is not None and cpu >= self.cpu_limit:
+                self.spawn()
+
+
+def install(environment, monitor, locustfile):
+    """Wire sampling (and, on a master with LOCUST_AUTOSCALE_MAX_WORKERS set, autoscaling) into a locust run."""
+    from locust.runners import MasterRunner, WorkerRunner
+
+    runner = environment.runner
+    if isinstance(runner, WorkerRunner):
+        worker = runner.client_id
+        on_sample = lambda sample: runner.send_message(MESSAGE_TYPE, dict(sample, worker=worker))
+    else:
+        worker = "master" if isinstance(runner, MasterRunner) else "local"
+        on_sample = lambda sample: monitor.record(worker, sample)
+    if isinstance(runner, MasterRunner):
+        runner.register_message(MESSAGE_TYPE, lambda environment, msg, **kwargs: monitor.record(msg.data["worker"], msg.data))
+
+        max_workers = int(os.environ.get("LOCUST_AUTOSCALE_MAX_WORKERS", 0))
+        if max_workers:
+            # Read by the master whenever a worker reports ready: with it set, a running
+            # test is restarted at the same target so users spread onto the new worker.
+            environment.parsed_options.enable_rebalancing = True
+            autoscaler = WorkerAutoscaler(
+                environment, monitor, locustfile,
+                min_workers=int(os.environ.get("LOCUST_AUTOSCALE_MIN_WORKERS", 1)),
+                max_workers=max_workers,
+                cpu_limit=float(os.environ.get("LOCUST_AUTOSCALE_CPU", 75)),
+            )
+            autoscaler.start()
+            environment.events.quitting.add_listener(lambda **kwargs: autoscaler.stop())
+
+    HealthSampler(environment, on_sample).start()
@@ -0,0 +1,182 @@
+"""
+Sidecar that samples the backend's /metrics endpoints at each load step.
+
+Run it next to locust with the same step length as StepLoadShape:
+
+    python -m loadtest.metrics_poller --host http://127.0.0.1:3000 \\
+        --endpoint /metrics/database --endpoint /metrics/conversation-cache \\
+        --interval 60 --out tmp/loadtest/metrics.jsonl
+
+Every interval it writes one JSON line per endpoint with the raw snapshot and
+the delta of every numeric counter since the previous sample, and prints the
+deltas, e.g. how many queries went to primary vs. primary_replica during the
+step (start the backend with DATABASE_QUERY_STATS=1 for those). For
+/metrics/jobs it also records per-job enqueue rate, duplicate enqueues, and
+queue latency / execution time (mean and p95) for the step (start the backend
+and the job workers with JOB_STATS=1 for those).
+
+Against a backend started with METRICS_TOKEN, pass the same value with
+--token (or export METRICS_TOKEN); production serves /metrics only then.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_ENDPOINTS = ["/metrics/database", "/metrics/conversation-cache", "/metrics/jobs"]
+JOBS_ENDPOINT = "/metrics/jobs"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="http://127.0.0.1:3000")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="Metrics path to sample; repeatable (default: %s)" % ", ".join(DEFAULT_ENDPOINTS))
+    parser.add_argument("--interval", type=int, default=60, help="Seconds between samples (one load step)")
+    parser.add_argument("--steps", type=int, default=None, help="Stop after this many samples")
+    parser.add_argument("--out", default="tmp/loadtest/metrics.jsonl")
+    parser.add_argument("--token", default=os.environ.get("METRICS_TOKEN"),
+                        help="Sent as X-Metrics-Token when the backend sets METRICS_TOKEN (default: $METRICS_TOKEN)")
+    return parser.parse_args(argv)
+
+
+def fetch(host, path, token=None):
+    request = urllib.request.Request(host.rstrip("/") + path)
+    if token:
+        request.add_header("X-Metrics-Token", token)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)
+
+
+def flatten(data, prefix=""):
+    """Flatten nested dicts into {'a.b': value} keeping only numeric leaves."""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def diff(previous, current):
+    """Per-counter change between two flattened snapshots."""
+    return {key: current[key] - previous.get(key, 0) for key in current}
+
+
+def _bucket_percentile(buckets, pct):
+    """Upper bound (ms) of the bucket holding the pct-th observation, from {'le100ms': n, ..., 'gtNms': n}."""
+    bounds = sorted((int(name[2:-2]), count) for name, count in buckets.items() if name.startswith("le"))
+    total = sum(buckets.values())
+    if not total:
+        return None
+    running = 0
+    for bound, count in bounds:
+        running += count
+        if running >= pct * total:
+            return bound
+    return float("inf")
+
+
+def job_step_summary(delta, interval):
+    """
+    Per-job rates over one step from the /metrics/jobs counter deltas: enqueue
+    rate, duplicate enqueues, and mean / p95 queue latency and execution time.
+    """
+    jobs = {}
+    for key, value in delta.items():
+        parts = key.split(".", 2)
+        if len(parts) == 3 and parts[0] == "jobs":
+            jobs.setdefault(parts[1], {})[parts[2]] = value
+
+    summary = {}
+    for job, counters in sorted(jobs.items()):
+        row = {"enqueued_per_s": round(counters.get("enqueued", 0) / interval, 3),
+               "duplicates": counters.get("duplicates", 0),
+               "failed": counters.get("failed", 0)}
+        for timing in ("queueLatency", "execution"):
+            count = counters.get(f"{timing}.count", 0)
+            buckets = {k.rsplit(".", 1)[1]: v for k, v in counters.items() if k.startswith(f"{timing}.buckets.")}
+            row[f"{timing}_ms_mean"] = round(counters.get(f"{timing}.msTotal", 0) / count, 1) if count else None
+            row[f"{timing}_ms_p95"] = _bucket_percentile(buckets, 0.95)
+        summary[job] = row
+    return summary
+
+
+class MetricsPoller:
+    """Samples a set of endpoints and keeps the previous snapshot for diffing."""
+
+    def __init__(self, host, endpoints, token=None):
+        self.host = host
+        self.endpoints = endpoints
+        self.token = token
+        self.previous = {}
+
+    def sample(self, step):
+        records = []
+        for path in self.endpoints:
+            try:
+                snapshot = fetch(self.host, path, self.token)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                records.append({"step": step, "time": time.time(), "endpoint": path, "error": str(e)})
+                continue
+            flat = flatten(snapshot)
+            records.append({
+                "step": step,
+                "time": time.time(),
+                "endpoint": path,
+                "snapshot": snapshot,
+                "delta": diff(self.previous.get(path, {}), flat),
+            })
+            self.previous[path] = flat
+        return records
+
+
+def step_boundaries(interval, steps=None):
+    """
+    Yield step numbers 0, 1, 2, ... at each step boundary, sleeping in between.
+    Step 0 fires immediately and serves as the baseline sample.
+    """
+    step = 0
+    next_sample = time.time()
+    while steps is None or step <= steps:
+        time.sleep(max(0.0, next_sample - time.time()))
+        yield step
+        step += 1
+        next_sample += interval
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    poller = MetricsPoller(args.host, args.endpoints or DEFAULT_ENDPOINTS, args.token)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "a") as out:
+        for step in step_boundaries(args.interval, args.steps):
+            for record in poller.sample(step):
+                if record["endpoint"] == JOBS_ENDPOINT and "delta" in record:
+                    record["jobs"] = job_step_summary(record["delta"], args.interval)
+                out.write(json.dumps(record) + "\n")
+                if "jobs" in record:
+                    queues = record["snapshot"].get("queues", {})
+                    summary = "; ".join(
+                        [f"{job} " + " ".join(f"{k}={v}" for k, v in row.items()) for job, row in record["jobs"].items()]
+                        + [f"queue {name} size={q.get('size')} latency={q.get('latencySeconds')}s" for name, q in queues.items()])
+                else:
+                    summary = record.get("error") or ", ".join(
+                        f"{key}={value:+g}" for key, value in sorted(record["delta"].items()))
+                print(f"step {step} {record['endpoint']}: {summary}", flush=True)
+            out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
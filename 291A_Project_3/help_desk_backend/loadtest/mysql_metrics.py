@@ -0,0 +1,161 @@
+"""
+MySQL statement-level metrics collector aligned to load steps.
+
+Samples performance_schema statement digests, InnoDB row-lock waits, buffer
+pool reads and connection counts at every StepLoadShape step boundary, diffs
+consecutive snapshots and reports, per step, the top query digests by total
+time and by rows examined. That shows when e.g. the unread-count queries or
+the `conversation.lock!` claim path start to dominate.
+
+Start it together with locust, using the same step length:
+
+    python -m loadtest.mysql_metrics --database help_desk_backend_development \\
+        --interval 60 --out tmp/loadtest/mysql_steps.jsonl
+
+Uses PyMySQL when installed and falls back to the `mysql` command-line client.
+performance_schema must be enabled (the MySQL 8 default).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from loadtest.metrics_poller import step_boundaries
+
+PICOSECONDS_PER_MS = 1e9
+
+DIGEST_QUERY = """
+SELECT DIGEST, LEFT(DIGEST_TEXT, 300), COUNT_STAR, SUM_TIMER_WAIT, SUM_LOCK_TIME,
+       SUM_ROWS_EXAMINED, SUM_ROWS_SENT, SUM_NO_INDEX_USED
+FROM performance_schema.events_statements_summary_by_digest
+WHERE SCHEMA_NAME = '{schema}'
+"""
+
+STATUS_VARIABLES = [
+    "Innodb_row_lock_waits", "Innodb_row_lock_time", "Innodb_row_lock_current_waits",
+    "Innodb_buffer_pool_read_requests", "Innodb_buffer_pool_reads",
+    "Threads_connected", "Threads_running", "Max_used_connections", "Connections", "Aborted_connects",
+]
+# Gauges are reported as-is; everything else is a counter and gets diffed.
+GAUGES = {"Innodb_row_lock_current_waits", "Threads_connected", "Threads_running", "Max_used_connections"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("DB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="help_desk_backend_development")
+    parser.add_argument("--interval", type=int, default=60, help="Seconds per load step")
+    parser.add_argument("--steps", type=int, default=None, help="Stop after this many steps")
+    parser.add_argument("--top", type=int, default=5, help="Digests to report per ranking")
+    parser.add_argument("--out", default="tmp/loadtest/mysql_steps.jsonl")
+    return parser.parse_args(argv)
+
+
+class MysqlClient:
+    """Runs read-only queries through PyMySQL, or the mysql CLI if it isn't installed."""
+
+    def __init__(self, host, port, user, password):
+        self.cli_args = ["mysql", f"--host={host}", f"--port={port}", f"--user={user}", "--batch", "--skip-column-names"]
+        if password:
+            self.cli_args.append(f"--password={password}")
+        try:
+            import pymysql
+        except ImportError:
+            self.connection = None
+        else:
+            self.connection = pymysql.connect(host=host, port=port, user=user, password=password, autocommit=True)
+
+    def rows(self, sql):
+        if self.connection:
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql)
+                return [list(row) for row in cursor.fetchall()]
+        output = subprocess.run(self.cli_args + ["-e", sql], capture_output=True, text=True, check=True).stdout
+        return [line.split("\t") for line in output.splitlines() if line]
+
+
+def take_snapshot(client, schema):
+    digests = {}
+    for digest, text, count, timer, lock, examined, sent, no_index in client.rows(DIGEST_QUERY.format(schema=schema)):
+        digests[digest] = {
+            "text": text or "",
+            "count": int(count),
+            "time_ms": int(timer) / PICOSECONDS_PER_MS,
+            "lock_ms": int(lock) / PICOSECONDS_PER_MS,
+            "rows_examined": int(examined),
+            "rows_sent": int(sent),
+            "no_index_used": int(no_index),
+        }
+
+    names = ", ".join(f"'{name}'" for name in STATUS_VARIABLES)
+    status = {name: int(value) for name, value in client.rows(
+        f"SHOW GLOBAL STATUS WHERE Variable_name IN ({names})")}
+    return {"digests": digests, "status": status}
+
+
+def diff_snapshots(previous, current, top):
+    """Per-step report: counter deltas plus the top digests by time and rows examined."""
+    deltas = []
+    for digest, now in current["digests"].items():
+        before = previous["digests"].get(digest, {})
+        delta = {key: now[key] - before.get(key, 0) for key in now if key != "text"}
+        if delta["count"] > 0:
+            deltas.append({"digest": digest, "text": now["text"], **delta})
+
+    status = {}
+    for name, value in current["status"].items():
+        status[name] = value if name in GAUGES else value - previous["status"].get(name, 0)
+
+    read_requests = status.get("Innodb_buffer_pool_read_requests", 0)
+    disk_reads = status.get("Innodb_buffer_pool_reads", 0)
+    return {
+        "status": status,
+        "buffer_pool_hit_rate": round(1 - disk_reads / read_requests, 6) if read_requests else None,
+        "top_by_time": sorted(deltas, key=lambda d: d["time_ms"], reverse=True)[:top],
+        "top_by_rows_examined": sorted(deltas, key=lambda d: d["rows_examined"], reverse=True)[:top],
+    }
+
+
+def format_report(step, report):
+    status = report["status"]
+    lines = [
+        f"== step {step}: row lock waits +{status.get('Innodb_row_lock_waits', 0)} "
+        f"({status.get('Innodb_row_lock_time', 0)} ms), buffer pool hit rate {report['buffer_pool_hit_rate']}, "
+        f"threads connected {status.get('Threads_connected')} running {status.get('Threads_running')}"
+    ]
+    for title, key in (("by total time", "top_by_time"), ("by rows examined", "top_by_rows_examined")):
+        lines.append(f"  top digests {title}:")
+        for d in report[key]:
+            lines.append(f"    {d['time_ms']:10.1f} ms {d['count']:8d} calls {d['rows_examined']:12d} rows  {d['text'][:120]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    client = MysqlClient(args.host, args.port, args.user, args.password)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+
+    previous = None
+    with open(args.out, "a") as out:
+        for step in step_boundaries(args.interval, args.steps):
+            snapshot = take_snapshot(client, args.database)
+            if previous is not None:
+                # The report for step N covers the interval that just ended.
+                report = diff_snapshots(previous, snapshot, args.top)
+                out.write(json.dumps({"step": step - 1, **report}) + "\n")
+                out.flush()
+                print(format_report(step - 1, report), flush=True)
+            previous = snapshot
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
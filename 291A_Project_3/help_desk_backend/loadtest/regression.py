@@ -0,0 +1,425 @@
+"""
+Performance regression gate.
+
+Turns one locust run into a machine-readable result bundle (per-endpoint,
+per-step throughput and latency percentiles, error rates, plus hashes of the
+scenario and the backend configuration) and compares a candidate bundle with
+a stored baseline.
+
+Run the fixed scenario against a backend that is already up and save it:
+
+    python -m loadtest.regression run --port 3000 --out tmp/loadtest/candidate.json
+
+or build a bundle from an existing `locust --csv PREFIX --csv-full-history` run:
+
+    python -m loadtest.regression save --csv-prefix tmp/loadtest/run/locust --out baseline.json
+
+then gate on it (exit status 1 on a significant regression, 2 when the
+bundles come from different scenarios):
+
+    python -m loadtest.regression compare baseline.json tmp/loadtest/candidate.json
+
+A step only counts as regressed when the change exceeds the relative
+tolerance AND is significant given the sample noise of both runs (Welch t
+test, expressed as the equivalent z score). Locust's per-second history rows are rolling aggregates over the
+last WINDOW_SECONDS, so consecutive rows share most of their requests and are
+not independent samples; each step is first downsampled to non-overlapping
+windows (throughput from the cumulative request counters, latency from the
+row that closes the window) and the test runs over those. Error rates use an
+absolute tolerance plus a two-proportion z test on the totals.
+
+The scenario hash covers the locustfile and every loadtest module it imports,
+so a change to the harness itself is reported as a scenario mismatch.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+
+from loadtest import stats
+from loadtest.sweep import run_locust
+
+BUNDLE_FORMAT = 3
+# Span of locust's rolling Requests/s and percentile columns in the stats history
+# (locust.stats.CURRENT_RESPONSE_TIME_PERCENTILE_WINDOW).
+WINDOW_SECONDS = 10
+HARNESS_IMPORT = re.compile(r"^[ \t]*from[ \t]+loadtest(?:\.(\w+))?[ \t]+import[ \t]+(\([\w\s,]+\)|[\w \t,]+)", re.MULTILINE)
+# Backend settings that change performance without changing code (see loadtest.sweep.Backend).
+CONFIG_ENV = ["RAILS_ENV", "WEB_CONCURRENCY", "RAILS_MAX_THREADS", "PUMA_PRELOAD", "DB_POOL",
+              "SIDEKIQ_CONCURRENCY", "DB_REPLICA_HOST", "REDIS_URL", "DATABASE_QUERY_STATS",
+              "JOB_STATS"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def bundle_options(command):
+        command.add_argument("--locustfile", default="locustfile.py")
+        command.add_argument("--step-duration", type=int, default=30,
+                             help="Seconds per StepLoadShape step (LOCUST_STEP_DURATION)")
+        command.add_argument("--run-time", default="5m", help="locust --run-time of the fixed scenario")
+        command.add_argument("--config", action="append", default=[], metavar="KEY=VALUE",
+                             help="Extra backend settings to record in the config hash; repeatable")
+        command.add_argument("--out", required=True, help="Bundle path (.json)")
+
+    run = commands.add_parser("run", help="Run the fixed scenario with locust and save its bundle")
+    bundle_options(run)
+    run.add_argument("--port", type=int, default=3000)
+    run.add_argument("--run-dir", default="tmp/loadtest/regression")
+
+    save = commands.add_parser("save", help="Build a bundle from existing locust CSV output")
+    bundle_options(save)
+    save.add_argument("--csv-prefix", required=True, help="The PREFIX given to locust --csv")
+    save.add_argument("--generator-csv", default=None,
+                      help="LOCUST_GENERATOR_CSV of the run (default: generator_health.csv next to the CSVs)")
+
+    compare = commands.add_parser("compare", help="Compare a candidate bundle with a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--rps-tolerance", type=float, default=0.05, help="Allowed relative throughput drop")
+    compare.add_argument("--latency-tolerance", type=float, default=0.10, help="Allowed relative p50/p99 increase")
+    compare.add_argument("--error-tolerance", type=float, default=0.005, help="Allowed absolute error-rate increase")
+    compare.add_argument("--z", type=float, default=3.0, help="Significance threshold (z score)")
+    compare.add_argument("--min-samples", type=int, default=3,
+                         help="Ignore steps with fewer %d-second windows in either run" % WINDOW_SECONDS)
+    compare.add_argument("--allow-scenario-mismatch", action="store_true")
+    return parser.parse_args(argv)
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _mean_sd(values):
+    if not values:
+        return None, None
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, 0.0
+    return mean, math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+
+def harness_files(locustfile):
+    """The locustfile plus the loadtest modules it imports, directly or through each other."""
+    package = os.path.join(os.path.dirname(os.path.abspath(locustfile)), "loadtest")
+    files, pending = [], [os.path.abspath(locustfile)]
+    while pending:
+        path = pending.pop()
+        if path in files:
+            continue
+        files.append(path)
+        with open(path) as f:
+            source = f.read()
+        for module, names in HARNESS_IMPORT.findall(source):
+            candidates = [module] if module else [name.strip() for name in names.strip("()").split(",")]
+            for name in candidates:
+                module_path = os.path.join(package, f"{name}.py")
+                if name and os.path.exists(module_path):
+                    pending.append(module_path)
+    return files
+
+
+def scenario_for(args):
+    root = os.path.dirname(os.path.abspath(args.locustfile))
+    # Keyed by path relative to the locustfile, so relative and absolute invocations match.
+    file_hashes = {}
+    for path in harness_files(args.locustfile):
+        with open(path, "rb") as f:
+            file_hashes[os.path.relpath(os.path.abspath(path), root)] = _sha256(f.read())
+    scenario = {"files_sha256": file_hashes, "step_duration": args.step_duration, "run_time": args.run_time}
+    scenario_hash = _sha256(json.dumps(scenario, sort_keys=True).encode())
+    # The path is informational only.
+    return dict(scenario, locustfile=args.locustfile), scenario_hash
+
+
+def config_for(args):
+    config = {name: os.environ[name] for name in CONFIG_ENV if name in os.environ}
+    for pair in args.config:
+        key, _, value = pair.partition("=")
+        config[key] = value
+    return config, _sha256(json.dumps(config, sort_keys=True).encode())
+
+
+def window_samples(rows, start, window=WINDOW_SECONDS):
+    """
+    Downsample per-second history rows to one sample per non-overlapping
+    `window` seconds from `start`. The last row in each window closes it: its
+    percentiles cover that window, and throughput is the change in the
+    cumulative request/failure counters since the previous window closed.
+    """
+    closing = {}
+    for row in rows:
+        closing[(row["timestamp"] - start) // window] = row
+    samples = []
+    previous = {"timestamp": start - 1, "requests": 0, "failures": 0}
+    for index in sorted(closing):
+        row = closing[index]
+        elapsed = row["timestamp"] - previous["timestamp"]
+        if elapsed > 0:
+            samples.append({
+                "timestamp": start + index * window,
+                "user_count": row["user_count"],
+                "requests": row["requests"] - previous["requests"],
+                "failures": row["failures"] - previous["failures"],
+                "rps": (row["requests"] - previous["requests"]) / elapsed,
+                "p50": row["p50"],
+                "p99": row["p99"],
+            })
+        previous = row
+    return samples
+
+
+def endpoint_steps(rows, step_duration, start):
+    """Per-step statistics over the non-overlapping windows of one endpoint's stats-history rows."""
+    steps = []
+    for index, samples in stats.group_steps(window_samples(rows, start), step_duration, start):
+        rps = [r["rps"] for r in samples]
+        # Percentile columns are 0 (N/A) for windows without completed requests.
+        p50 = [r["p50"] for r in samples if r["p50"]]
+        p99 = [r["p99"] for r in samples if r["p99"]]
+        rps_mean, rps_sd = _mean_sd(rps)
+        p50_mean, p50_sd = _mean_sd(p50)
+        p99_mean, p99_sd = _mean_sd(p99)
+        requests = sum(r["requests"] for r in samples)
+        steps.append({
+            "step": index,
+            "users": max(r["user_count"] for r in samples),
+            "samples": len(samples),
+            "rps": rps_mean, "rps_sd": rps_sd,
+            "p50_ms": p50_mean, "p50_sd": p50_sd,
+            "p99_ms": p99_mean, "p99_sd": p99_sd,
+            "latency_samples": len(p99),
+            "error_rate": sum(r["failures"] for r in samples) / requests if requests else 0.0,
+        })
+    return steps
+
+
+def build_bundle(csv_prefix, args):
+    history = stats.read_history(f"{csv_prefix}_stats_history.csv")
+    totals = stats.read_totals(f"{csv_prefix}_stats.csv")
+    aggregated = history.get("Aggregated", [])
+    start = aggregated[0]["timestamp"] if aggregated else None
+    scenario, scenario_hash = scenario_for(args)
+    config, config_hash = config_for(args)
+    generator_csv = getattr(args, "generator_csv", None) or os.path.join(os.path.dirname(csv_prefix), "generator_health.csv")
+    invalid_steps = stats.read_invalid_steps(generator_csv)
+
+    endpoints = {}
+    for key, total in totals.items():
+        rows = history.get(key, [])
+        steps = endpoint_steps(rows, args.step_duration, start) if rows and start is not None else []
+        for step in steps:
+            step["valid"] = step["step"] not in invalid_steps
+        endpoints[key] = {"type": total["type"], "name": total["name"], "totals": total, "steps": steps}
+
+    return {
+        "format": BUNDLE_FORMAT,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "scenario": scenario,
+        "scenario_hash": scenario_hash,
+        "config": config,
+        "config_hash": config_hash,
+        "invalid_steps": sorted(invalid_steps),
+        "window_seconds": WINDOW_SECONDS,
+        "endpoints": endpoints,
+    }
+
+
+def write_bundle(bundle, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(bundle, f, indent=2, sort_keys=True)
+    print(f"bundle written to {path} ({len(bundle['endpoints'])} endpoints)")
+
+
+def _betacf(a, b, x):
+    """Continued fraction for the regularized incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 200):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return result
+
+
+def _t_two_sided_p(t, df):
+    """P(|T| >= t) for Student's t with `df` degrees of freedom."""
+    x = df / (df + t * t)
+    a, b = df / 2, 0.5
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def _equivalent_z(p):
+    """The normal z score with the same two-sided p-value."""
+    low, high = 0.0, 40.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        if math.erfc(mid / math.sqrt(2)) > p:
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def _z(base_mean, base_sd, base_n, cand_mean, cand_sd, cand_n):
+    """
+    Welch t test on two sets of window samples, reported as the normal z with
+    the same p-value so --z means the same thing whatever the sample count.
+    """
+    if base_n < 2 or cand_n < 2:
+        return 0.0
+    base_var, cand_var = (base_sd or 0) ** 2 / base_n, (cand_sd or 0) ** 2 / cand_n
+    stderr = math.sqrt(base_var + cand_var)
+    if stderr == 0:
+        return math.inf if cand_mean != base_mean else 0.0
+    t = abs(cand_mean - base_mean) / stderr
+    df = (base_var + cand_var) ** 2 / (base_var ** 2 / (base_n - 1) + cand_var ** 2 / (cand_n - 1))
+    return _equivalent_z(_t_two_sided_p(t, df))
+
+
+def _proportion_z(base_failures, base_requests, cand_failures, cand_requests):
+    if not base_requests or not cand_requests:
+        return 0.0
+    pooled = (base_failures + cand_failures) / (base_requests + cand_requests)
+    stderr = math.sqrt(pooled * (1 - pooled) * (1 / base_requests + 1 / cand_requests))
+    if stderr == 0:
+        return 0.0
+    return abs(cand_failures / cand_requests - base_failures / base_requests) / stderr
+
+
+def compare_bundles(baseline, candidate, args):
+    """Return a list of findings; each is a dict with severity 'regression' or 'improvement'."""
+    findings = []
+
+    def check(endpoint, step, metric, base, cand, base_sd, cand_sd, base_n, cand_n, tolerance, higher_is_worse):
+        if base is None or cand is None or not base:
+            return
+        change = (cand - base) / base
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        better = change < -tolerance if higher_is_worse else change > tolerance
+        if not (worse or better):
+            return
+        z = _z(base, base_sd, base_n, cand, cand_sd, cand_n)
+        if z < args.z:
+            return
+        findings.append({"severity": "regression" if worse else "improvement", "endpoint": endpoint, "step": step,
+                         "metric": metric, "baseline": base, "candidate": cand, "change": change, "z": z})
+
+    for name in sorted(set(baseline["endpoints"]) & set(candidate["endpoints"])):
+        base_endpoint, cand_endpoint = baseline["endpoints"][name], candidate["endpoints"][name]
+        cand_steps = {s["step"]: s for s in cand_endpoint["steps"]}
+        for base_step in base_endpoint["steps"]:
+            cand_step = cand_steps.get(base_step["step"])
+            if not cand_step or min(base_step["samples"], cand_step["samples"]) < args.min_samples:
+                continue
+            # The load generator was saturated in one of the runs.
+            if not (base_step.get("valid", True) and cand_step.get("valid", True)):
+                continue
+            step = base_step["step"]
+            check(name, step, "rps", base_step["rps"], cand_step["rps"], base_step["rps_sd"], cand_step["rps_sd"],
+                  base_step["samples"], cand_step["samples"], args.rps_tolerance, higher_is_worse=False)
+            for metric in ("p50", "p99"):
+                check(name, step, f"{metric}_ms", base_step[f"{metric}_ms"], cand_step[f"{metric}_ms"],
+                      base_step[f"{metric}_sd"], cand_step[f"{metric}_sd"],
+                      base_step["latency_samples"], cand_step["latency_samples"],
+                      args.latency_tolerance, higher_is_worse=True)
+            if cand_step["error_rate"] - base_step["error_rate"] > args.error_tolerance:
+                findings.append({"severity": "regression", "endpoint": name, "step": step, "metric": "error_rate",
+                                 "baseline": base_step["error_rate"], "candidate": cand_step["error_rate"],
+                                 "change": cand_step["error_rate"] - base_step["error_rate"], "z": None})
+
+        base_totals, cand_totals = base_endpoint["totals"], cand_endpoint["totals"]
+        increase = cand_totals["error_rate"] - base_totals["error_rate"]
+        z = _proportion_z(base_totals["failures"], base_totals["requests"], cand_totals["failures"], cand_totals["requests"])
+        if increase > args.error_tolerance and z >= args.z:
+            findings.append({"severity": "regression", "endpoint": name, "step": None, "metric": "error_rate",
+                             "baseline": base_totals["error_rate"], "candidate": cand_totals["error_rate"],
+                             "change": increase, "z": z})
+    return findings
+
+
+def format_findings(findings):
+    if not findings:
+        return "no significant changes"
+    lines = ["%-11s %-45s %5s %-10s %12s %12s %9s %7s" % (
+        "severity", "endpoint", "step", "metric", "baseline", "candidate", "change", "z")]
+    for f in sorted(findings, key=lambda f: (f["severity"], f["endpoint"], f["step"] if f["step"] is not None else -1)):
+        change = "%+.1f%%" % (f["change"] * 100) if f["metric"] != "error_rate" else "%+.4f" % f["change"]
+        lines.append("%-11s %-45s %5s %-10s %12.3f %12.3f %9s %7s" % (
+            f["severity"], f["endpoint"][:45], "all" if f["step"] is None else f["step"], f["metric"],
+            f["baseline"], f["candidate"], change, "-" if f["z"] is None else ("inf" if math.isinf(f["z"]) else "%.1f" % f["z"])))
+    return "\n".join(lines)
+
+
+def load_bundle(path):
+    with open(path) as f:
+        bundle = json.load(f)
+    if bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path}: unsupported bundle format {bundle.get('format')!r}")
+    return bundle
+
+
+def compare_command(args):
+    baseline, candidate = load_bundle(args.baseline), load_bundle(args.candidate)
+    if baseline["scenario_hash"] != candidate["scenario_hash"]:
+        print("scenario differs between bundles:", baseline["scenario"], "vs", candidate["scenario"])
+        if not args.allow_scenario_mismatch:
+            return 2
+    if baseline["config_hash"] != candidate["config_hash"]:
+        print("note: backend config differs:", baseline["config"], "vs", candidate["config"])
+
+    skipped = sorted(set(baseline.get("invalid_steps", [])) | set(candidate.get("invalid_steps", [])))
+    if skipped:
+        print("skipping steps where the load generator was saturated:", ", ".join(map(str, skipped)))
+    findings = compare_bundles(baseline, candidate, args)
+    print(f"baseline {baseline.get('revision')} ({baseline['created_at']}) vs "
+          f"candidate {candidate.get('revision')} ({candidate['created_at']})")
+    print(format_findings(findings))
+    regressions = [f for f in findings if f["severity"] == "regression"]
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "compare":
+        return compare_command(args)
+
+    if args.command == "run":
+        os.makedirs(args.run_dir, exist_ok=True)
+        csv_prefix = run_locust(args, args.run_dir)
+    else:
+        csv_prefix = args.csv_prefix
+    write_bundle(build_bundle(csv_prefix, args), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Helpers for reading locust CSV output (--csv / --csv-full-history).
+"""
+
+import csv
+import os
+
+
+def endpoint_key(request_type, name):
+    """
+    Key for one locust stats row. Locust groups requests by (method, name), so
+    the name alone is not unique: GET and POST /conversations are separate rows.
+    The 'Aggregated' row has no method and keeps its bare name.
+    """
+    return f"{request_type} {name}" if request_type else name
+
+
+def read_aggregated_history(history_csv):
+    """Return the 'Aggregated' rows of a *_stats_history.csv file, oldest first."""
+    return read_history(history_csv).get("Aggregated", [])
+
+
+def read_history(history_csv):
+    """Return {endpoint_key: rows} for every endpoint in a *_stats_history.csv file, oldest first."""
+    history = {}
+    with open(history_csv, newline="") as f:
+        for row in csv.DictReader(f):
+            history.setdefault(endpoint_key(row.get("Type"), row.get("Name")), []).append({
+                "timestamp": int(row["Timestamp"]),
+                "user_count": int(row["User Count"] or 0),
+                "rps": _float(row["Requests/s"]),
+                "fps": _float(row["Failures/s"]),
+                "p50": _float(row["50%"]),
+                "p99": _float(row["99%"]),
+                "requests": int(row["Total Request Count"] or 0),
+                "failures": int(row["Total Failure Count"] or 0),
+            })
+    return history
+
+
+def per_step(history_rows, step_duration, start=None):
+    """
+    Group aggregated history rows into load steps of `step_duration` seconds,
+    measured from `start` (default: the first sample). Returns one summary
+    dict per step.
+    """
+    if not history_rows:
+        return []
+
+    start = history_rows[0]["timestamp"] if start is None else start
+    summaries = []
+    for index, rows in group_steps(history_rows, step_duration, start):
+        rps = sum(r["rps"] for r in rows) / len(rows)
+        fps = sum(r["fps"] for r in rows) / len(rows)
+        summaries.append({
+            "step": index,
+            "users": max(r["user_count"] for r in rows),
+            "rps": rps,
+            "error_rate": fps / rps if rps else 0.0,
+            "p50": max(r["p50"] for r in rows),
+            "p99": max(r["p99"] for r in rows),
+        })
+    return summaries
+
+
+def group_steps(history_rows, step_duration, start):
+    """Yield (step_index, rows) for history rows bucketed by step, in step order."""
+    steps = {}
+    for row in history_rows:
+        steps.setdefault((row["timestamp"] - start) // step_duration, []).append(row)
+    for index in sorted(steps):
+        yield index, steps[index]
+
+
+def read_totals(stats_csv):
+    """Return {endpoint_key: {...}} from a *_stats.csv file, including 'Aggregated'."""
+    totals = {}
+    with open(stats_csv, newline="") as f:
+        for row in csv.DictReader(f):
+            requests = int(row["Request Count"] or 0)
+            failures = int(row["Failure Count"] or 0)
+            totals[endpoint_key(row["Type"], row["Name"])] = {
+                "type": row["Type"],
+                "name": row["Name"],
+                "requests": requests,
+                "failures": failures,
+                "error_rate": failures / requests if requests else 0.0,
+                "rps": _float(row["Requests/s"]),
+                "p50": _float(row["50%"]),
+                "p99": _float(row["99%"]),
+            }
+    return totals
+
+
+def read_invalid_steps(generator_csv):
+    """Steps flagged as generator-saturated in a generator_health.csv file (empty if it doesn't exist)."""
+    if not os.path.exists(generator_csv):
+        return set()
+    with open(generator_csv, newline="") as f:
+        return {int(row["step"]) for row in csv.DictReader(f) if row.get("saturated") == "1"}
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,235 @@
+"""
+Puma / DB pool / Sidekiq configuration sweep.
+
+Boots the backend locally under every combination of Puma workers, Puma
+threads, Active Record pool size and Sidekiq concurrency, runs the same
+headless locust scenario (locustfile.py with StepLoadShape) against each one,
+and prints a table of max sustainable throughput, p99 and error rate.
+
+Run from help_desk_backend/ with MySQL and Redis up:
+
+    python -m loadtest.sweep --workers 1,2,4 --threads 3,5 --sidekiq 5,10
+
+A step counts as sustainable when its p99 and error rate stay under
+--slo-p99-ms and --max-error-rate; max sustainable throughput is the highest
+mean RPS over those steps.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+from loadtest import stats
+
+Combination = namedtuple("Combination", ["workers", "threads", "db_pool", "sidekiq", "preload"])
+
+# Threads of the per-job Sidekiq capsules (config/initializers/sidekiq.rb), on top of --sidekiq.
+JOB_CAPSULE_ENV = {"JOB_ASSIGNMENT_CONCURRENCY": 3, "JOB_FAQ_CONCURRENCY": 2, "JOB_SUMMARY_CONCURRENCY": 2}
+
+RESULT_COLUMNS = ["workers", "threads", "db_pool", "sidekiq", "preload",
+                  "max_sustainable_rps", "p99_ms", "error_rate", "steps_sustained"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1", help="Puma worker counts (WEB_CONCURRENCY), comma separated")
+    parser.add_argument("--threads", default="3", help="Puma thread counts (RAILS_MAX_THREADS), comma separated")
+    parser.add_argument("--db-pool", default="auto",
+                        help="Active Record pool sizes (DB_POOL); 'auto' matches the thread count")
+    parser.add_argument("--sidekiq", default="5", help="Sidekiq concurrency values, comma separated")
+    parser.add_argument("--preload", default="on",
+                        help="'on', 'off' or 'on,off'; only applies to combinations with workers > 1")
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--rails-env", default="development")
+    parser.add_argument("--locustfile", default="locustfile.py")
+    parser.add_argument("--step-duration", type=int, default=30,
+                        help="Seconds per StepLoadShape step (LOCUST_STEP_DURATION)")
+    parser.add_argument("--run-time", default=None, help="Optional locust --run-time cap, e.g. 5m")
+    parser.add_argument("--slo-p99-ms", type=float, default=1000.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--boot-timeout", type=int, default=120)
+    parser.add_argument("--no-sidekiq", action="store_true", help="Don't start a Sidekiq process")
+    parser.add_argument("--out", default="tmp/loadtest/sweep", help="Directory for logs and CSV output")
+    return parser.parse_args(argv)
+
+
+def expand_matrix(args):
+    """Return every Combination described by the comma separated arguments."""
+    def values(raw):
+        return [v.strip() for v in raw.split(",") if v.strip()]
+
+    combinations = []
+    for workers, threads, pool, sidekiq in itertools.product(
+            values(args.workers), values(args.threads), values(args.db_pool), values(args.sidekiq)):
+        workers, threads, sidekiq = int(workers), int(threads), int(sidekiq)
+        db_pool = threads if pool == "auto" else int(pool)
+        # Preload only means something in cluster mode.
+        preloads = [p == "on" for p in values(args.preload)] if workers > 1 else [False]
+        for preload in dict.fromkeys(preloads):
+            combinations.append(Combination(workers, threads, db_pool, sidekiq, preload))
+    return combinations
+
+
+def label_for(combination):
+    return "w{}-t{}-pool{}-sk{}{}".format(
+        combination.workers, combination.threads, combination.db_pool, combination.sidekiq,
+        "-preload" if combination.preload else "")
+
+
+class Backend:
+    """
+    Runs Puma (and optionally Sidekiq) for one combination; use as a context
+    manager so the processes are always torn down.
+    """
+
+    def __init__(self, combination, args, log_dir):
+        self.combination = combination
+        self.args = args
+        self.log_dir = log_dir
+        self.processes = []
+
+    def env(self, db_pool):
+        env = dict(os.environ)
+        env.update({
+            "RAILS_ENV": self.args.rails_env,
+            "PORT": str(self.args.port),
+            "WEB_CONCURRENCY": str(self.combination.workers),
+            "RAILS_MAX_THREADS": str(self.combination.threads),
+            "PUMA_PRELOAD": "1" if self.combination.preload else "0",
+            "SIDEKIQ_CONCURRENCY": str(self.combination.sidekiq),
+            "DB_POOL": str(db_pool),
+        })
+        return env
+
+    def spawn(self, name, command, env):
+        log = open(os.path.join(self.log_dir, f"{name}.log"), "w")
+        # New session so the whole process group (puma workers included) can be signalled.
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        self.processes.append((process, log))
+        return process
+
+    def __enter__(self):
+        self.spawn("puma", ["bundle", "exec", "puma", "-C", "config/puma.rb"], self.env(self.combination.db_pool))
+        if not self.args.no_sidekiq:
+            # Every Sidekiq thread, in every capsule, needs its own connection.
+            capsule_threads = sum(int(os.environ.get(name, default)) for name, default in JOB_CAPSULE_ENV.items())
+            pool = max(self.combination.db_pool, self.combination.sidekiq + capsule_threads)
+            self.spawn("sidekiq", ["bundle", "exec", "sidekiq", "-C", "config/sidekiq.yml"], self.env(pool))
+        self.wait_for_health()
+        return self
+
+    def __exit__(self, *exc):
+        for process, _log in self.processes:
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGTERM)
+        for process, log in self.processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            log.close()
+        return False
+
+    def wait_for_health(self):
+        url = f"http://127.0.0.1:{self.args.port}/health"
+        deadline = time.time() + self.args.boot_timeout
+        while time.time() < deadline:
+            for process, _log in self.processes:
+                if process.poll() is not None:
+                    raise RuntimeError(f"backend exited during boot, see logs in {self.log_dir}")
+            try:
+                with urllib.request.urlopen(url, timeout=2) as response:
+                    if response.status == 200:
+                        return
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            time.sleep(1)
+        raise RuntimeError(f"backend did not become healthy within {self.args.boot_timeout}s")
+
+
+def run_locust(args, run_dir):
+    prefix = os.path.join(run_dir, "locust")
+    command = [
+        "locust", "-f", args.locustfile, "--headless",
+        "--host", f"http://127.0.0.1:{args.port}",
+        "--csv", prefix, "--csv-full-history", "--only-summary",
+    ]
+    if args.run_time:
+        command += ["--run-time", args.run_time]
+    env = dict(os.environ, LOCUST_STEP_DURATION=str(args.step_duration),
+               LOCUST_GENERATOR_CSV=os.path.join(run_dir, "generator_health.csv"))
+    with open(os.path.join(run_dir, "locust.log"), "w") as log:
+        # locust exits non-zero when any request failed; that's data, not an error.
+        subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return prefix
+
+
+def summarize(combination, csv_prefix, args):
+    steps = stats.per_step(stats.read_aggregated_history(f"{csv_prefix}_stats_history.csv"), args.step_duration)
+    totals = stats.read_totals(f"{csv_prefix}_stats.csv").get("Aggregated", {})
+    # Steps where locust itself was saturated say nothing about the backend.
+    invalid = stats.read_invalid_steps(os.path.join(os.path.dirname(csv_prefix), "generator_health.csv"))
+    steps = [s for s in steps if s["step"] not in invalid]
+
+    sustained = [s for s in steps if s["p99"] <= args.slo_p99_ms and s["error_rate"] <= args.max_error_rate]
+    best = max(sustained, key=lambda s: s["rps"], default=None)
+
+    return {
+        **combination._asdict(),
+        "max_sustainable_rps": round(best["rps"], 1) if best else 0.0,
+        "p99_ms": best["p99"] if best else None,
+        "error_rate": round(totals.get("error_rate", 0.0), 4),
+        "steps_sustained": f"{len(sustained)}/{len(steps)}",
+    }
+
+
+def print_table(results, out=sys.stdout):
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in RESULT_COLUMNS}
+    out.write("  ".join(c.ljust(widths[c]) for c in RESULT_COLUMNS) + "\n")
+    out.write("  ".join("-" * widths[c] for c in RESULT_COLUMNS) + "\n")
+    for result in results:
+        out.write("  ".join(str(result[c]).ljust(widths[c]) for c in RESULT_COLUMNS) + "\n")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    combinations = expand_matrix(args)
+    os.makedirs(args.out, exist_ok=True)
+
+    results = []
+    for index, combination in enumerate(combinations, start=1):
+        label = label_for(combination)
+        run_dir = os.path.join(args.out, label)
+        os.makedirs(run_dir, exist_ok=True)
+        print(f"[{index}/{len(combinations)}] {label}", flush=True)
+
+        try:
+            with Backend(combination, args, run_dir):
+                csv_prefix = run_locust(args, run_dir)
+            results.append(summarize(combination, csv_prefix, args))
+        except (RuntimeError, OSError) as e:
+            print(f"  skipped: {e}", flush=True)
+
+    if not results:
+        return 1
+
+    results.sort(key=lambda r: r["max_sustainable_rps"], reverse=True)
+    print_table(results)
+    with open(os.path.join(args.out, "results.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
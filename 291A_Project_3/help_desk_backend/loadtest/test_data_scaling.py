@@ -0,0 +1,66 @@
+"""
+Tests for the locust CSV readers behind the data-scaling and regression reports.
+
+    python -m unittest loadtest.test_data_scaling
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+from loadtest import data_scaling, stats
+
+STATS_HEADER = ["Type", "Name", "Request Count", "Failure Count", "Requests/s", "50%", "99%"]
+HISTORY_HEADER = ["Timestamp", "User Count", "Type", "Name", "Requests/s", "Failures/s", "50%", "99%",
+                  "Total Request Count", "Total Failure Count"]
+
+
+class TwoMethodsOnOneNameTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write_csv(self, name, header, rows):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return path
+
+    def stats_csv(self):
+        return self.write_csv("locust_stats.csv", STATS_HEADER, [
+            ["GET", "/conversations", "100", "0", "5", "10", "20"],
+            ["POST", "/conversations", "40", "2", "2", "30", "80"],
+            ["", "Aggregated", "140", "2", "7", "12", "60"],
+        ])
+
+    def test_size_results_keeps_one_row_per_method(self):
+        rows = {r["endpoint"]: r for r in data_scaling.size_results(1000, self.stats_csv())}
+
+        self.assertEqual(["Aggregated", "GET /conversations", "POST /conversations"], sorted(rows))
+        self.assertEqual(("GET", "/conversations", 100, 20.0),
+                         tuple(rows["GET /conversations"][k] for k in ("method", "name", "requests", "p99_ms")))
+        self.assertEqual(("POST", "/conversations", 40, 80.0),
+                         tuple(rows["POST /conversations"][k] for k in ("method", "name", "requests", "p99_ms")))
+        self.assertEqual(0.05, rows["POST /conversations"]["error_rate"])
+        self.assertEqual(1000, rows["Aggregated"]["conversations"])
+
+    def test_read_history_keeps_one_series_per_method(self):
+        path = self.write_csv("locust_stats_history.csv", HISTORY_HEADER, [
+            ["1000", "10", "GET", "/conversations", "5", "0", "10", "20", "50", "0"],
+            ["1000", "10", "POST", "/conversations", "2", "0", "30", "80", "20", "0"],
+            ["1000", "10", "", "Aggregated", "7", "0", "12", "60", "70", "0"],
+            ["1001", "10", "GET", "/conversations", "6", "0", "11", "21", "56", "0"],
+        ])
+
+        history = stats.read_history(path)
+
+        self.assertEqual([50, 56], [r["requests"] for r in history["GET /conversations"]])
+        self.assertEqual([20], [r["requests"] for r in history["POST /conversations"]])
+        self.assertEqual([70], [r["requests"] for r in stats.read_aggregated_history(path)])
+
+
+if __name__ == "__main__":
+    unittest.main()
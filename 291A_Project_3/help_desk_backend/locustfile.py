@@ -7,27 +7,36 @@ User personas:
 3. Active user that uses existing usernames to create conversations, post messages, and browse
 """
 
+import os
 import random
 import threading
 from datetime import datetime
 from locust import HttpUser, task, between
 from locust import LoadTestShape
+from locust import events
+from locust.runners import WorkerRunner
 import time
 
+from loadtest import delivery, generator_health
+from loadtest.delivery import DeliveryTracker, tag_content
+
+# Seconds per load step; the harness sweep shortens this to keep runs manageable.
+STEP_DURATION = int(os.environ.get("LOCUST_STEP_DURATION", 60))
+
 class StepLoadShape(LoadTestShape):
    # dynamic arrival rate plan
     steps = [
-        (60, 2),
-        (60, 8),
-        (60, 32),
-        (60, 64),
-        (60, 128),
-        (60, 256),
-        (60, 512),
-        (60, 1024),
-        (60, 2048),
-        (60, 4096),
-        (60, 8192),
+        (STEP_DURATION, 2),
+        (STEP_DURATION, 8),
+        (STEP_DURATION, 32),
+        (STEP_DURATION, 64),
+        (STEP_DURATION, 128),
+        (STEP_DURATION, 256),
+        (STEP_DURATION, 512),
+        (STEP_DURATION, 1024),
+        (STEP_DURATION, 2048),
+        (STEP_DURATION, 4096),
+        (STEP_DURATION, 8192),
     ]
 
     def tick(self):
@@ -44,6 +53,7 @@ class StepLoadShape(LoadTestShape):
 
 # Configuration
 MAX_USERS = 10000
+MESSAGE_PAGE_SIZE = 20
 
 class UserNameGenerator:
     PRIME_NUMBERS = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
@@ -107,6 +117,31 @@ class UserStore:
 
 user_store = UserStore()
 user_name_generator = UserNameGenerator(max_users=MAX_USERS)
+delivery_tracker = DeliveryTracker(step_duration=STEP_DURATION)
+DELIVERY_CSV = os.environ.get("LOCUST_DELIVERY_CSV", "tmp/loadtest/delivery_latency.csv")
+generator_monitor = generator_health.GeneratorMonitor(step_duration=STEP_DURATION)
+GENERATOR_CSV = os.environ.get("LOCUST_GENERATOR_CSV", "tmp/loadtest/generator_health.csv")
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    generator_health.install(environment, generator_monitor, __file__)
+    delivery.install(environment, delivery_tracker, DELIVERY_CSV)
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    delivery_tracker.start()
+    generator_monitor.start()
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    # Workers ship their samples to the master, which reports for all of them.
+    if not isinstance(environment.runner, WorkerRunner):
+        generator_monitor.write_csv(GENERATOR_CSV)
+        print(generator_monitor.format_summary())
+
 
 class ChatBackend():
     """
@@ -156,7 +191,7 @@ class ChatBackend():
         return None  
     
     def send_message(self, user, convo_id):
-        content = f"Message {random.randint(1, 10000) * random.randint(1, 10000)}"
+        content, _send_id = tag_content(f"Message {random.randint(1, 10000) * random.randint(1, 10000)}")
         response = self.client.post(
             "/messages",
             json={"conversationId": convo_id, "content": content},
@@ -166,6 +201,55 @@ class ChatBackend():
         return response.status_code in (200, 201)
 
 
+    def fetch_messages(self, user, convo_id, name):
+        """
+        Fetch conversation messages using cursor pagination: the newest page on
+        first view, then only the delta since the last message ID we have seen.
+        """
+        last_seen_id = self.last_seen_message_ids.get(convo_id)
+        if last_seen_id:
+            params = {"after": last_seen_id, "limit": MESSAGE_PAGE_SIZE}
+        else:
+            params = {"limit": MESSAGE_PAGE_SIZE}
+
+        response = self.client.get(
+            f"/conversations/{convo_id}/messages",
+            params=params,
+            headers=self.auth_headers(user.get("auth_token")),
+            name=name
+        )
+        if response.status_code != 200:
+            return None
+
+        messages = response.json()
+        if messages:
+            self.last_seen_message_ids[convo_id] = int(messages[-1]["id"])
+        self.record_deliveries(user, messages, "history_fetch")
+        return messages
+
+    def record_deliveries(self, user, messages, channel):
+        """
+        Record end-to-end latency for messages from others seen for the first
+        time. Kept out of locust's request stats (and so out of the Aggregated
+        totals the sweep and regression tools read); see DELIVERY_CSV.
+        """
+        delivery_tracker.observe(messages, user.get("user_id"), channel)
+
+    def mark_messages_read(self, user, convo_id, messages):
+        """Mark everything we just viewed as read with one bulk request."""
+        user_id = str(user.get("user_id"))
+        unread = [m for m in messages or [] if not m.get("isRead") and m.get("senderId") != user_id]
+        if not unread:
+            return False
+
+        response = self.client.put(
+            f"/conversations/{convo_id}/messages/read",
+            json={"upToMessageId": unread[-1]["id"]},
+            headers=self.auth_headers(user.get("auth_token")),
+            name="/conversations/:id/messages/read"
+        )
+        return response.status_code == 200
+
     def check_conversation_updates(self, user):
         """Check for conversation updates."""
         params = {"userId": user.get("user_id")}
@@ -194,7 +278,10 @@ class ChatBackend():
             name="/api/messages/updates"
         )
 
-        return response.status_code == 200
+        if response.status_code != 200:
+            return False
+        self.record_deliveries(user, response.json(), "updates_poll")
+        return True
 
 
     def check_expert_queue_updates(self, user):
@@ -342,6 +429,7 @@ class InitiatorUser(HttpUser, ChatBackend):
             raise Exception(f"InitiatorUser: Failed to login or register user {username}")
         
         self.my_conversations = []
+        self.last_seen_message_ids = {}
 
     @task(3)
     def create_conversation_and_send_message(self):
@@ -357,19 +445,14 @@ class InitiatorUser(HttpUser, ChatBackend):
         """Check conversations for new messages from experts."""
         if self.my_conversations:
             conversation_id = random.choice(self.my_conversations)
-            response = self.client.get(
-                f"/conversations/{conversation_id}/messages",
-                headers=self.auth_headers(self.user.get("auth_token")),
-                name="/conversations/{conversation_id}/messages"
-            )
         elif user_store.conversations:
             conversation_id = user_store.get_user_convo(self.user.get("username"))
-            if conversation_id:
-                response = self.client.get(
-                    f"/conversations/{conversation_id}/messages",
-                    headers=self.auth_headers(self.user.get("auth_token")),
-                    name="/conversations/{conversation_id}/messages"
-                )
+        else:
+            conversation_id = None
+
+        if conversation_id:
+            messages = self.fetch_messages(self.user, conversation_id, "/conversations/{conversation_id}/messages")
+            self.mark_messages_read(self.user, conversation_id, messages)
     
     @task(4)
     def respond_to_expert(self):
@@ -536,6 +619,8 @@ class LightUser(HttpUser, ChatBackend):
         if not self.user:
             raise Exception(f"LightUser: Failed to initialize user {username}")
 
+        self.last_seen_message_ids = {}
+
     @task(4)
     def view_conversations(self):
         # loads convo
@@ -563,11 +648,8 @@ class LightUser(HttpUser, ChatBackend):
         convo = random.choice(convos)
         convo_id = convo["id"]
 
-        self.client.get(
-            f"/conversations/{convo_id}/messages",
-            headers=self.auth_headers(self.user["auth_token"]),
-            name="/conversations/:id/messages"
-        )
+        messages = self.fetch_messages(self.user, convo_id, "/conversations/:id/messages")
+        self.mark_messages_read(self.user, convo_id, messages)
 
     @task(1)
     def maybe_create_conversation(self):
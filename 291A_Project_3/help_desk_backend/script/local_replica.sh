@@ -0,0 +1,101 @@
+#!/usr/bin/env bash
+# Starts a docker-free MySQL primary/replica pair for testing read/write splitting.
+#
+#   script/local_replica.sh start   # primary on 3306, replica on 3307 (GTID replication)
+#   script/local_replica.sh status
+#   script/local_replica.sh stop
+#
+# Then run the app with:
+#   DB_HOST=127.0.0.1 DB_REPLICA_HOST=127.0.0.1 DB_REPLICA_PORT=3307 bin/rails server
+#
+# Add DATABASE_QUERY_STATS=1 to see the primary/replica split at /metrics/database.
+#
+# Data lives under tmp/mysql; delete that directory to start over. Requires the
+# mysqld and mysql binaries (MySQL 8.0+) on PATH.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+BASE_DIR="${MYSQL_REPLICA_BASE_DIR:-$ROOT/tmp/mysql}"
+PRIMARY_PORT="${PRIMARY_PORT:-3306}"
+REPLICA_PORT="${REPLICA_PORT:-3307}"
+
+datadir() { echo "$BASE_DIR/$1"; }
+socket() { echo "$BASE_DIR/$1.sock"; }
+client() { mysql --protocol=socket --socket="$(socket "$1")" -uroot "${@:2}"; }
+
+init_instance() {
+  local name=$1
+  if [ ! -d "$(datadir "$name")/mysql" ]; then
+    mkdir -p "$(datadir "$name")"
+    mysqld --initialize-insecure --datadir="$(datadir "$name")" --log-error="$BASE_DIR/$name.err"
+  fi
+}
+
+start_instance() {
+  local name=$1 port=$2 server_id=$3
+  shift 3
+  if [ -S "$(socket "$name")" ] && client "$name" -e "SELECT 1" >/dev/null 2>&1; then
+    echo "$name already running on port $port"
+    return
+  fi
+  mysqld --datadir="$(datadir "$name")" \
+    --port="$port" --bind-address=127.0.0.1 \
+    --socket="$(socket "$name")" --mysqlx=OFF \
+    --pid-file="$BASE_DIR/$name.pid" --log-error="$BASE_DIR/$name.err" \
+    --server-id="$server_id" --gtid-mode=ON --enforce-gtid-consistency=ON \
+    --log-bin=binlog "$@" &
+  for _ in $(seq 1 60); do
+    client "$name" -e "SELECT 1" >/dev/null 2>&1 && { echo "$name started on port $port"; return; }
+    sleep 1
+  done
+  echo "$name did not start, see $BASE_DIR/$name.err" >&2
+  exit 1
+}
+
+start() {
+  mkdir -p "$BASE_DIR"
+  init_instance primary
+  init_instance replica
+  start_instance primary "$PRIMARY_PORT" 1
+  start_instance replica "$REPLICA_PORT" 2 --read-only=ON --super-read-only=ON
+
+  # Rails connects as passwordless root over TCP, matching config/database.yml.
+  client primary -e "
+    CREATE USER IF NOT EXISTS 'root'@'127.0.0.1' IDENTIFIED BY '';
+    GRANT ALL ON *.* TO 'root'@'127.0.0.1' WITH GRANT OPTION;"
+
+  if ! client replica -e "SHOW REPLICA STATUS\G" | grep -q "Replica_IO_Running: Yes"; then
+    client replica -e "
+      SET GLOBAL super_read_only = OFF;
+      CREATE USER IF NOT EXISTS 'root'@'127.0.0.1' IDENTIFIED BY '';
+      GRANT ALL ON *.* TO 'root'@'127.0.0.1' WITH GRANT OPTION;
+      RESET MASTER;
+      SET GLOBAL super_read_only = ON;
+      CHANGE REPLICATION SOURCE TO
+        SOURCE_HOST='127.0.0.1', SOURCE_PORT=$PRIMARY_PORT, SOURCE_USER='root', SOURCE_PASSWORD='',
+        SOURCE_AUTO_POSITION=1, GET_SOURCE_PUBLIC_KEY=1;
+      START REPLICA;"
+  fi
+  status
+}
+
+stop() {
+  for name in replica primary; do
+    if [ -f "$BASE_DIR/$name.pid" ]; then
+      kill "$(cat "$BASE_DIR/$name.pid")" 2>/dev/null || true
+      echo "stopped $name"
+    fi
+  done
+}
+
+status() {
+  client primary -e "SELECT @@port AS primary_port, @@gtid_executed AS gtid_executed\G" || true
+  client replica -e "SHOW REPLICA STATUS\G" | grep -E "Replica_(IO|SQL)_Running:|Seconds_Behind_Source:" || true
+}
+
+case "${1:-}" in
+  start) start ;;
+  stop) stop ;;
+  status) status ;;
+  *) echo "usage: $0 {start|stop|status}" >&2; exit 1 ;;
+esac
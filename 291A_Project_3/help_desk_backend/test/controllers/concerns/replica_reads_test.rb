@@ -0,0 +1,48 @@
+require "test_helper"
+
+class ReplicaReadsTest < ActionDispatch::IntegrationTest
+  def setup
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+    @user = User.create!(username: "replicauser", password: "password123")
+    @headers = { "Authorization" => "Bearer #{JwtService.encode(@user)}" }
+    @conversation = Conversation.create!(title: "Replica Conversation", initiator: @user, status: "waiting")
+  end
+
+  test "read-only endpoints run under the reading role" do
+    ApplicationRecord.expects(:connected_to).with(role: :reading).yields.once
+    get "/conversations", headers: @headers
+    assert_response :ok
+  end
+
+  test "a user who just wrote reads from the primary until STICKY_WINDOW passes" do
+    post "/messages", params: { conversationId: @conversation.id, content: "Hello" }, headers: @headers
+    assert_response :created
+    assert Rails.cache.exist?(ReplicaReads.last_write_key(@user.id))
+
+    ApplicationRecord.expects(:connected_to).never
+    get "/conversations/#{@conversation.id}/messages", headers: @headers
+    assert_response :ok
+    assert_equal [ "Hello" ], JSON.parse(response.body).map { |m| m["content"] }
+
+    travel ReplicaReads::STICKY_WINDOW + 1.second do
+      ApplicationRecord.unstub(:connected_to)
+      ApplicationRecord.expects(:connected_to).with(role: :reading).yields.once
+      get "/conversations/#{@conversation.id}/messages", headers: @headers
+      assert_response :ok
+    end
+  end
+
+  test "failed writes do not make the user sticky" do
+    post "/messages", params: { conversationId: @conversation.id, content: "" }, headers: @headers
+    assert_response :unprocessable_entity
+    assert_not Rails.cache.exist?(ReplicaReads.last_write_key(@user.id))
+  end
+
+  test "the reading role falls back to the primary when no primary_replica is configured" do
+    assert_nil ActiveRecord::Base.configurations.configs_for(env_name: Rails.env, name: "primary_replica")
+
+    reading_config = ApplicationRecord.connected_to(role: :reading) { ApplicationRecord.connection_db_config }
+    assert_equal ApplicationRecord.connection_db_config.name, reading_config.name
+    assert_equal ApplicationRecord.connection_db_config.database, reading_config.database
+  end
+end
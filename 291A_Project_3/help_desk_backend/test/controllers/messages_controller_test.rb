@@ -1,6 +1,17 @@
 require "test_helper"
 
 class MessagesControllerTest < ActionDispatch::IntegrationTest
+  include ActiveJob::TestHelper
+
+  def setup
+    @user = User.create!(username: "testuser", password: "password123")
+    @token = JwtService.encode(@user)
+    @conversation = Conversation.create!(title: "Test Conversation", initiator: @user, status: "waiting")
+    @messages = 5.times.map do |i|
+      @conversation.messages.create!(sender: @user, sender_role: "initiator", content: "Message #{i}")
+    end
+  end
+
   test "should get index" do
     get messages_index_url
     assert_response :success
@@ -15,4 +26,89 @@ class MessagesControllerTest < ActionDispatch::IntegrationTest
     get messages_mark_read_url
     assert_response :success
   end
+
+  test "GET /conversations/:id/messages returns full history without cursor params" do
+    get "/conversations/#{@conversation.id}/messages", headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    assert_equal @messages.map { |m| m.id.to_s }, JSON.parse(response.body).map { |m| m["id"] }
+  end
+
+  test "GET /conversations/:id/messages with limit returns the newest page in ascending order" do
+    get "/conversations/#{@conversation.id}/messages",
+        params: { limit: 2 },
+        headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    assert_equal @messages.last(2).map { |m| m.id.to_s }, JSON.parse(response.body).map { |m| m["id"] }
+  end
+
+  test "GET /conversations/:id/messages with before returns the page older than the cursor" do
+    get "/conversations/#{@conversation.id}/messages",
+        params: { before: @messages[3].id, limit: 2 },
+        headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    assert_equal @messages[1..2].map { |m| m.id.to_s }, JSON.parse(response.body).map { |m| m["id"] }
+  end
+
+  test "GET /conversations/:id/messages with after returns only newer messages" do
+    get "/conversations/#{@conversation.id}/messages",
+        params: { after: @messages[2].id },
+        headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    response_data = JSON.parse(response.body)
+    assert_equal @messages[3..].map { |m| m.id.to_s }, response_data.map { |m| m["id"] }
+    assert_equal @user.username, response_data.first["senderUsername"]
+  end
+
+  test "GET /conversations/:id/messages merges archived messages only when asked" do
+    @conversation.update!(status: "resolved")
+    @messages.first(2).each { |m| m.update!(is_read: true, created_at: 100.days.ago) }
+    DataRetention.new(pause: 0).run
+
+    get "/conversations/#{@conversation.id}/messages", headers: { "Authorization" => "Bearer #{@token}" }
+    assert_equal @messages.drop(2).map { |m| m.id.to_s }, JSON.parse(response.body).map { |m| m["id"] }
+
+    get "/conversations/#{@conversation.id}/messages",
+        params: { includeArchived: true, limit: 4 },
+        headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    assert_equal @messages.last(4).map { |m| m.id.to_s }, JSON.parse(response.body).map { |m| m["id"] }
+  end
+
+  test "PUT /conversations/:id/messages/read marks the other participant's messages read" do
+    expert = User.create!(username: "expertuser", password: "password123")
+    @conversation.update!(assigned_expert: expert, status: "active")
+    replies = 3.times.map { |i| @conversation.messages.create!(sender: expert, sender_role: "expert", content: "Reply #{i}") }
+
+    put "/conversations/#{@conversation.id}/messages/read",
+        params: { upToMessageId: replies[1].id },
+        headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    assert_equal 2, JSON.parse(response.body)["markedCount"]
+    assert_equal [true, true, false], replies.map { |m| m.reload.is_read }
+    assert @messages.none? { |m| m.reload.is_read }, "own messages must stay unread"
+
+    put "/conversations/#{@conversation.id}/messages/read", headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :ok
+    assert_equal 1, JSON.parse(response.body)["markedCount"]
+  end
+
+  test "GET /conversations/:id/messages requires user to be a participant" do
+    other_user = User.create!(username: "otheruser", password: "password123")
+    get "/conversations/#{@conversation.id}/messages",
+        params: { limit: 2 },
+        headers: { "Authorization" => "Bearer #{JwtService.encode(other_user)}" }
+    assert_response :forbidden
+  end
+
+  test "POST /messages queues the FAQ auto-response instead of running it inline" do
+    expert = User.create!(username: "faqexpert", password: "password123")
+    @conversation.update!(assigned_expert: expert, status: "active")
+
+    post "/messages", params: { conversationId: @conversation.id, content: "How do I reset my password?" },
+                      headers: { "Authorization" => "Bearer #{@token}" }
+    assert_response :created
+
+    message_id = JSON.parse(response.body)["id"].to_i
+    assert_enqueued_with(job: AutoRespondFromFaqJob, args: [message_id], queue: "faq_responses")
+  end
 end
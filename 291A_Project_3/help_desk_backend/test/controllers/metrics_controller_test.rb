@@ -0,0 +1,46 @@
+require "test_helper"
+
+class MetricsControllerTest < ActionDispatch::IntegrationTest
+  def setup
+    @metrics_token = ENV.delete("METRICS_TOKEN")
+  end
+
+  def teardown
+    ENV["METRICS_TOKEN"] = @metrics_token
+  end
+
+  test "GET /metrics/database is served outside production without a token" do
+    get "/metrics/database"
+    assert_response :ok
+  end
+
+  test "GET /metrics/database requires X-Metrics-Token when METRICS_TOKEN is set" do
+    ENV["METRICS_TOKEN"] = "s3cret"
+
+    get "/metrics/database"
+    assert_response :unauthorized
+
+    get "/metrics/database", headers: { "X-Metrics-Token" => "wrong" }
+    assert_response :unauthorized
+
+    get "/metrics/database", headers: { "X-Metrics-Token" => "s3cret" }
+    assert_response :ok
+  end
+
+  test "GET /metrics/jobs reports that job stats are disabled without JOB_STATS" do
+    previous = ENV.delete("JOB_STATS")
+
+    get "/metrics/jobs"
+    assert_response :ok
+    assert_equal false, response.parsed_body["enabled"]
+  ensure
+    ENV["JOB_STATS"] = previous
+  end
+
+  test "GET /metrics/jobs is hidden in production without a token" do
+    Rails.env.stubs(:production?).returns(true)
+
+    get "/metrics/jobs"
+    assert_response :not_found
+  end
+end
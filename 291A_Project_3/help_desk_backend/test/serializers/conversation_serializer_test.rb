@@ -0,0 +1,92 @@
+require "test_helper"
+
+class ConversationSerializerTest < ActiveSupport::TestCase
+  def setup
+    @initiator = User.create!(username: "initiator", password: "password123")
+    @expert = User.create!(username: "expert", password: "password123")
+    @conversation = Conversation.create!(title: "Test Conversation", initiator: @initiator, assigned_expert: @expert, status: "active")
+    @conversation.messages.create!(sender: @expert, sender_role: "expert", content: "Hello")
+  end
+
+  test "collection_for_user computes unreadCount per viewer" do
+    as_initiator = ConversationSerializer.collection_for_user([@conversation], viewer_id: @initiator.id).first
+    as_expert = ConversationSerializer.collection_for_user([@conversation], viewer_id: @expert.id).first
+
+    assert_equal 1, as_initiator[:unreadCount]
+    assert_equal 0, as_expert[:unreadCount]
+    assert_equal as_initiator.except(:unreadCount), as_expert.except(:unreadCount)
+  end
+
+  test "for_user keeps the response field order" do
+    payload = ConversationSerializer.for_user(@conversation, viewer_id: @initiator.id)
+    assert_equal %i[id title status questionerId questionerUsername assignedExpertId assignedExpertUsername
+                    createdAt updatedAt lastMessageAt unreadCount summary], payload.keys
+  end
+
+  test "collection_for_user gives the same payload for a relation and loaded records" do
+    relation = Conversation.where(id: @conversation.id)
+    from_records = ConversationSerializer.collection_for_user(relation.to_a, viewer_id: @initiator.id)
+
+    assert_equal from_records, ConversationSerializer.collection_for_user(relation, viewer_id: @initiator.id)
+    assert_equal from_records.to_json, FastJson.generate(from_records)
+  end
+
+  test "collection_for_user serves the shared fields from the cache until the conversation is touched" do
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+
+    first = ConversationSerializer.collection_for_user([@conversation], viewer_id: @initiator.id)
+    assert_equal({ hits: 0, misses: 1, hitRatio: 0.0 }, ConversationSerializer.cache_stats)
+
+    # Written behind the model's back: only a new updated_at invalidates the entry.
+    @conversation.update_column(:title, "Renamed")
+    cached = ConversationSerializer.collection_for_user(Conversation.where(id: @conversation.id), viewer_id: @initiator.id)
+    assert_equal first, cached
+    assert_equal({ hits: 1, misses: 1, hitRatio: 0.5 }, ConversationSerializer.cache_stats)
+
+    travel 1.second do
+      @conversation.reload.touch
+      fresh = ConversationSerializer.for_user(@conversation, viewer_id: @initiator.id)
+      assert_equal "Renamed", fresh[:title]
+      assert_equal @conversation.updated_at.iso8601, fresh[:updatedAt]
+    end
+    assert_equal 2, ConversationSerializer.cache_stats[:misses]
+  end
+
+  test "the summary is read on every request, not from the cached fields" do
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+    relation = Conversation.where(id: @conversation.id)
+
+    assert_equal "Generating summary...", ConversationSerializer.collection_for_user(relation, viewer_id: @initiator.id).first[:summary]
+    # Stored without touching updated_at, so the shared fields are still a cache hit.
+    @conversation.update_columns(summary: "Customer asks about billing", message_count_at_summary: 1)
+
+    payload = ConversationSerializer.collection_for_user(relation, viewer_id: @initiator.id).first
+    assert_equal "Customer asks about billing", payload[:summary]
+    assert_equal 1, ConversationSerializer.cache_stats[:hits]
+  end
+
+  test "summary generation is queued once per retry window" do
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+    GenerateSummaryJob.expects(:perform_later).with(@conversation.id).twice
+
+    2.times { ConversationSerializer.for_user(@conversation, viewer_id: @initiator.id) }
+    # The job failed and no summary was stored: it is queued again after the window.
+    travel ConversationSerializer::SUMMARY_RETRY_AFTER + 1.second do
+      ConversationSerializer.for_user(@conversation, viewer_id: @initiator.id)
+    end
+  end
+
+  test "collection_for_user counts messages for the summary with one grouped query per table" do
+    conversations = Array.new(3) do |i|
+      Conversation.create!(title: "Page #{i}", initiator: @initiator, status: "waiting").tap do |conversation|
+        conversation.messages.create!(sender: @initiator, sender_role: "initiator", content: "Hi #{i}")
+      end
+    end
+
+    assert_queries_match(/COUNT.*FROM `archived_messages`/i, count: 1) do
+      assert_queries_match(/COUNT.*FROM `messages`.*GROUP BY/i, count: 2) do # the summary counts and unreadCount
+        ConversationSerializer.collection_for_user(Conversation.where(id: conversations.map(&:id)), viewer_id: @expert.id)
+      end
+    end
+  end
+end
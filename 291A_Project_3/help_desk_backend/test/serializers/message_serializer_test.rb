@@ -0,0 +1,23 @@
+require "test_helper"
+
+class MessageSerializerTest < ActiveSupport::TestCase
+  def setup
+    @initiator = User.create!(username: "initiator", password: "password123")
+    @expert = User.create!(username: "expert", password: "password123")
+    @conversation = Conversation.create!(title: "Test Conversation", initiator: @initiator, assigned_expert: @expert, status: "active")
+    @conversation.messages.create!(sender: @initiator, sender_role: "initiator", content: "<b>Tom & Jerry</b> \u2028 caf\u00e9")
+    @conversation.messages.create!(sender: @expert, sender_role: "expert", content: "Reply", is_read: true)
+  end
+
+  test "collection encodes to the same bytes as rendering the models" do
+    messages = @conversation.messages.order(:id)
+    expected = messages.map { |message| MessageSerializer.for_message(message) }.to_json
+
+    assert_equal expected, FastJson.generate(MessageSerializer.collection(messages))
+  end
+
+  test "collection keeps the relation order" do
+    ids = MessageSerializer.collection(@conversation.messages.order(id: :desc)).map { |m| m[:id] }
+    assert_equal @conversation.messages.order(id: :desc).map { |m| m.id.to_s }, ids
+  end
+end
@@ -0,0 +1,91 @@
+require "test_helper"
+
+class DataRetentionTest < ActiveSupport::TestCase
+  def setup
+    @initiator = User.create!(username: "initiator", password: "password123")
+    @expert = User.create!(username: "expert", password: "password123")
+    @conversation = Conversation.create!(title: "Old Conversation", initiator: @initiator, assigned_expert: @expert, status: "resolved")
+    @old_read = @conversation.messages.create!(sender: @initiator, sender_role: "initiator", content: "Old", is_read: true,
+                                               created_at: 100.days.ago)
+    @old_unread = @conversation.messages.create!(sender: @expert, sender_role: "expert", content: "Unread", created_at: 100.days.ago)
+    @recent = @conversation.messages.create!(sender: @initiator, sender_role: "initiator", content: "Recent", is_read: true)
+    @assignment = @conversation.expert_assignments.create!(expert: @expert, status: "resolved", assigned_at: 200.days.ago,
+                                                           resolved_at: 190.days.ago)
+  end
+
+  def run_retention
+    DataRetention.new(batch_size: 1, pause: 0).run
+  end
+
+  test "archives old read messages of resolved conversations only" do
+    run_retention
+
+    assert_equal [@old_read.id], ArchivedMessage.where(conversation_id: @conversation.id).pluck(:id)
+    assert_equal [@old_unread.id, @recent.id].sort, @conversation.messages.pluck(:id).sort
+    archived = ArchivedMessage.find_by(id: @old_read.id)
+    assert_equal "Old", archived.content
+    assert_equal DataRetention.month_key(@old_read.created_at), archived.archive_month
+  end
+
+  test "leaves messages of unresolved conversations alone" do
+    @conversation.update!(status: "active")
+    run_retention
+
+    assert_equal 0, ArchivedMessage.where(conversation_id: @conversation.id).count
+  end
+
+  test "archives resolved assignments and prunes expired sessions" do
+    stale = ActiveRecord::SessionStore::Session.create!(session_id: SecureRandom.hex(16), data: {}, updated_at: 2.days.ago)
+    fresh = ActiveRecord::SessionStore::Session.create!(session_id: SecureRandom.hex(16), data: {})
+
+    results = run_retention
+
+    assert_not ExpertAssignment.exists?(@assignment.id)
+    assert ArchivedExpertAssignment.exists?(id: @assignment.id)
+    assert_not ActiveRecord::SessionStore::Session.exists?(stale.id)
+    assert ActiveRecord::SessionStore::Session.exists?(fresh.id)
+    assert_operator results["sessions"], :>=, 1
+  end
+
+  test "max_batches caps a run across all resolved conversations" do
+    other = Conversation.create!(title: "Other Old Conversation", initiator: @initiator, status: "resolved")
+    other.messages.create!(sender: @initiator, sender_role: "initiator", content: "Also old", is_read: true, created_at: 100.days.ago)
+
+    results = DataRetention.new(batch_size: 1, pause: 0, max_batches: 1).run
+
+    assert_equal 1, results["messages"]
+    assert_equal 1, ArchivedMessage.where(conversation_id: [@conversation.id, other.id]).count
+  end
+
+  test "the resolved-conversation walk resumes where the last run stopped" do
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+    other = Conversation.create!(title: "Other Old Conversation", initiator: @initiator, status: "resolved")
+    other.messages.create!(sender: @initiator, sender_role: "initiator", content: "Also old", is_read: true, created_at: 100.days.ago)
+    retention = -> { DataRetention.new(policies: DataRetention.policies.first(1), batch_size: 1, pause: 0, max_batches: 1).run }
+
+    assert_equal 1, retention.call["messages"]
+    assert_equal 1, retention.call["messages"]
+    assert_equal 2, ArchivedMessage.where(conversation_id: [@conversation.id, other.id]).count
+
+    # The pass is complete; nothing is rescanned until PARENT_PASS_INTERVAL has passed.
+    other.messages.create!(sender: @initiator, sender_role: "initiator", content: "Aged", is_read: true, created_at: 100.days.ago)
+    assert_equal 0, retention.call["messages"]
+    travel DataRetention::PARENT_PASS_INTERVAL + 1.minute do
+      assert_equal 1, retention.call["messages"]
+    end
+  end
+
+  test "archived messages still count toward the summary's message count" do
+    @conversation.update!(summary: "Summarized", message_count_at_summary: 3)
+    run_retention
+
+    assert_equal 3, @conversation.total_message_count
+    assert_not ConversationSerializer.should_generate_summary?("Summarized", 3, @conversation.total_message_count)
+    assert_equal "Summarized", ConversationSerializer.for_user(@conversation.reload, viewer_id: @initiator.id)[:summary]
+  end
+
+  test "next_month_key rolls over the year" do
+    assert_equal 202611, DataRetention.next_month_key(202610)
+    assert_equal 202701, DataRetention.next_month_key(202612)
+  end
+end
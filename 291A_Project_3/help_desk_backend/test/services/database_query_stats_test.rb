@@ -0,0 +1,43 @@
+require "test_helper"
+
+class DatabaseQueryStatsTest < ActiveSupport::TestCase
+  def setup
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+    Current.query_counts_by_database = nil
+  end
+
+  test "counts queries per database config, skipping cached, schema and transaction statements" do
+    subscriber = ActiveSupport::Notifications.subscribe("sql.active_record") { |event| DatabaseQueryStats.track(event) }
+    begin
+      User.count
+      User.uncached { User.first }
+      ApplicationRecord.transaction { User.count }
+      User.cache { 2.times { User.count } }
+    ensure
+      ActiveSupport::Notifications.unsubscribe(subscriber)
+    end
+
+    assert_equal({ "primary" => 4 }, Current.query_counts_by_database)
+  end
+
+  test "flush adds the request's counts to the shared totals and resets them" do
+    Current.query_counts_by_database = Hash.new(0).merge("primary" => 3)
+    DatabaseQueryStats.flush
+    Current.query_counts_by_database = Hash.new(0).merge("primary" => 1)
+    DatabaseQueryStats.flush
+
+    assert_nil Current.query_counts_by_database
+    snapshot = DatabaseQueryStats.snapshot
+    assert_equal 4, snapshot[:queries]["primary"]
+    assert_equal 1.0, snapshot[:share]["primary"]
+  end
+
+  test "is disabled unless DATABASE_QUERY_STATS is set" do
+    previous = ENV.delete("DATABASE_QUERY_STATS")
+    assert_not DatabaseQueryStats.enabled?
+    ENV["DATABASE_QUERY_STATS"] = "1"
+    assert DatabaseQueryStats.enabled?
+  ensure
+    ENV["DATABASE_QUERY_STATS"] = previous
+  end
+end
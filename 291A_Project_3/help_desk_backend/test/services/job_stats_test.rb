@@ -0,0 +1,64 @@
+require "test_helper"
+
+class JobStatsTest < ActiveSupport::TestCase
+  include ActiveJob::TestHelper
+
+  def setup
+    Rails.stubs(:cache).returns(ActiveSupport::Cache::MemoryStore.new)
+    @subscribers = JobStats.subscribe
+  end
+
+  def teardown
+    @subscribers.each { |subscriber| ActiveSupport::Notifications.unsubscribe(subscriber) }
+  end
+
+  test "counts duplicate enqueues while an identical job is pending" do
+    GenerateSummaryJob.perform_later(-1)
+    GenerateSummaryJob.perform_later(-1)
+    GenerateSummaryJob.perform_later(-2)
+
+    stats = JobStats.snapshot[:jobs]["GenerateSummaryJob"]
+    assert_equal 3, stats[:enqueued]
+    assert_equal 1, stats[:duplicates]
+  end
+
+  test "records queue latency and execution time for performed jobs" do
+    GenerateSummaryJob.perform_later(-1)
+    perform_enqueued_jobs
+    GenerateSummaryJob.perform_later(-1)
+
+    stats = JobStats.snapshot[:jobs]["GenerateSummaryJob"]
+    assert_equal 1, stats[:started]
+    assert_equal 1, stats[:performed]
+    assert_equal 1, stats[:queueLatency][:count]
+    assert_equal 1, stats[:execution][:buckets].values.sum
+    assert_equal 0, stats[:duplicates], "a job that already started is no longer pending"
+  end
+
+  test "a started job clears its pending entry by job_id" do
+    job = GenerateSummaryJob.new(-1)
+    job.enqueued_at = Time.current
+    JobStats.enqueued(job)
+    job.arguments = [-1.0] # deserialized differently from what was enqueued
+    JobStats.started(job)
+    GenerateSummaryJob.perform_later(-1)
+
+    assert_equal 0, JobStats.snapshot[:jobs]["GenerateSummaryJob"][:duplicates]
+  end
+
+  test "is disabled unless JOB_STATS is set" do
+    previous = ENV.delete("JOB_STATS")
+    assert_not JobStats.enabled?
+    assert_equal false, JobStats.snapshot[:enabled]
+    ENV["JOB_STATS"] = "1"
+    assert JobStats.enabled?
+  ensure
+    ENV["JOB_STATS"] = previous
+  end
+
+  test "uses a dedicated queue per job" do
+    assert_equal "assignment", AutoAssignExpertJob.new.queue_name
+    assert_equal "summaries", GenerateSummaryJob.new.queue_name
+    assert_equal "faq_responses", AutoRespondFromFaqJob.new.queue_name
+  end
+end